@@ -3,13 +3,18 @@
 Main entry point for MCP Operator server
 """
 
-import asyncio
+import os
 import argparse
-from mcp_operator.server import main as server_main
 
 def main():
     """Parse arguments and run the MCP server"""
     parser = argparse.ArgumentParser(description="MCP Operator Server")
+    parser.add_argument(
+        "--log-dir", 
+        type=str, 
+        default=None,
+        help="Directory for server logs (default: $MCP_LOG_DIR or logs)"
+    )
     parser.add_argument(
         "--debug", 
         action="store_true", 
@@ -18,8 +23,16 @@ def main():
     
     args = parser.parse_args()
     
+    # Logging is configured when the server module is imported, so set the
+    # environment first and import the server afterwards
+    if args.log_dir:
+        os.environ["MCP_LOG_DIR"] = args.log_dir
+    if args.debug:
+        os.environ["MCP_DEBUG"] = "1"
+    
     # Run the server
-    asyncio.run(server_main())
+    from mcp_operator.server import run as server_run
+    server_run()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
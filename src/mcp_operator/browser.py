@@ -5,40 +5,77 @@ Browser operator implementation for MCP
 
 import os
 import sys
-import json
 import asyncio
-import uuid
 import base64
-from typing import Dict, Any, Optional, List, Union
+import re
+from typing import Dict, Any, Optional, List, Union, Set, Deque
+from collections import deque
 from datetime import datetime
 from pathlib import Path
 from urllib.parse import urlparse
 import logging
 
+from mcp_operator.logconfig import setup_file_logging
+
 # Set up logging (file only, no stdout to preserve MCP protocol)
 log_dir = Path(os.environ.get("MCP_LOG_DIR", "logs"))
 log_dir.mkdir(exist_ok=True)
 log_file = log_dir / f"mcp_operator_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler(log_file),
-        # No stream handler to avoid interfering with MCP JSON-RPC
-    ]
-)
+# Configure logging to file only (no stdout), written off the event loop
+setup_file_logging(log_file)
 
 logger = logging.getLogger("mcp-operator")
 
 # Import CUA components
 from mcp_operator.cua.agent import Agent
-from mcp_operator.cua.computer import AsyncLocalPlaywrightComputer
+from mcp_operator.cua.computer import AsyncLocalPlaywrightComputer, get_browser, get_playwright
+
+# Random ids for jobs and unnamed browsers, generated in batches so each id
+# doesn't cost its own urandom read
+ID_BATCH_SIZE = 128
+_id_pool: Deque[str] = deque()
+
+def _random_id() -> str:
+    """Return a random 128-bit id as 32 hex characters"""
+    if not _id_pool:
+        raw = os.urandom(16 * ID_BATCH_SIZE)
+        _id_pool.extend(raw[i:i + 16].hex() for i in range(0, len(raw), 16))
+    return _id_pool.popleft()
+
+# Known harmful domains; requests to them or any host ending in them are aborted
+BLOCKED_DOMAINS = ("evil.com", "malware.org", "phishing.com")
+
+# Matches URLs on a blocked host. Playwright applies it to each request itself,
+# so requests to other hosts never reach a Python route handler.
+BLOCKED_URL_RE = re.compile(
+    r"^[a-z][a-z0-9+.-]*://(?:[^/?#@]*@)?[^/?#:@]*(?:"
+    + "|".join(re.escape(domain) for domain in BLOCKED_DOMAINS)
+    + r")(?::\d*)?(?:[/?#]|$)",
+    re.IGNORECASE
+)
+
+async def _abort_blocked_request(route, request):
+    """Route handler that aborts a request to a blocked domain"""
+    logger.warning("Blocked access to harmful site: %s", request.url)
+    await route.abort()
+
+# Chromium flags for project browsers, besides the window size
+BROWSER_LAUNCH_FLAGS = (
+    "--disable-extensions",
+    "--disable-web-security",
+    "--disable-infobars",
+    "--disable-notifications"
+)
 
 class BrowserInstance:
     """Manages a single browser instance"""
     
+    __slots__ = (
+        "project_name", "headless", "dimensions", "browser", "context",
+        "page", "playwright", "initialized"
+    )
+    
     def __init__(self, project_name: str):
         """Initialize browser instance
         
@@ -52,32 +89,20 @@ class BrowserInstance:
         self.context = None
         self.page = None
         self.playwright = None
-        self.playwright_context = None
         self.initialized = False
-        logger.info(f"Browser instance created for project: {project_name}")
+        logger.info("Browser instance created for project: %s", project_name)
     
     async def initialize(self):
         """Initialize the browser using Playwright"""
         width, height = self.dimensions
         
-        from playwright.async_api import async_playwright
-        self.playwright_context = async_playwright()
-        self.playwright = await self.playwright_context.__aenter__()
-        
-        # Configure browser launch options
-        browser_options = {
-            "headless": self.headless,
-            "args": [
-                f"--window-size={width},{height}",
-                "--disable-extensions",
-                "--disable-web-security",
-                "--disable-infobars",
-                "--disable-notifications"
-            ]
-        }
+        self.playwright = await get_playwright()
         
-        logger.info(f"Launching browser with options: {browser_options}")
-        self.browser = await self.playwright.chromium.launch(**browser_options)
+        # Projects share one Chromium process per launch settings and are kept
+        # apart by giving each its own context
+        args = (f"--window-size={width},{height}", *BROWSER_LAUNCH_FLAGS)
+        logger.info("Getting browser with headless=%s, args=%s", self.headless, args)
+        self.browser = await get_browser(self.headless, args)
         
         # Create a context with specified viewport dimensions
         self.context = await self.browser.new_context(
@@ -85,27 +110,16 @@ class BrowserInstance:
             user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36"
         )
         
-        # Set up the domain filter to protect against malicious websites
-        async def handle_route(route, request):
-            url = request.url
-            hostname = urlparse(url).hostname
-            
-            # Block known harmful domains
-            blocked_domains = ["evil.com", "malware.org", "phishing.com"]
-            if hostname and any(hostname.endswith(domain) for domain in blocked_domains):
-                logger.warning(f"Blocked access to harmful site: {url}")
-                await route.abort()
-            else:
-                await route.continue_()
-        
-        await self.context.route("**/*", handle_route)
-        
-        # Create the page
-        self.page = await self.context.new_page()
-        await self.page.goto("about:blank")
+        # Set up the domain filter to protect against malicious websites and
+        # create the page together. The page starts on about:blank and makes no
+        # requests before the filter is in place.
+        _, self.page = await asyncio.gather(
+            self.context.route(BLOCKED_URL_RE, _abort_blocked_request),
+            self.context.new_page()
+        )
         
         self.initialized = True
-        logger.info(f"Browser initialized for project: {self.project_name}")
+        logger.info("Browser initialized for project: %s", self.project_name)
     
     async def close(self):
         """Close the browser and cleanup resources"""
@@ -113,37 +127,286 @@ class BrowserInstance:
             try:
                 await self.page.close()
             except Exception as e:
-                logger.error(f"Error closing page: {e}")
+                logger.error("Error closing page: %s", e)
         
+        # Closing the context ends this project's session; the shared browser
+        # keeps running for other projects
         if self.context:
             try:
                 await self.context.close()
             except Exception as e:
-                logger.error(f"Error closing context: {e}")
-        
-        if self.browser:
-            try:
-                await self.browser.close()
-            except Exception as e:
-                logger.error(f"Error closing browser: {e}")
-        
-        if self.playwright_context:
-            try:
-                await self.playwright_context.__aexit__(None, None, None)
-            except Exception as e:
-                logger.error(f"Error stopping playwright: {e}")
+                logger.error("Error closing context: %s", e)
         
         self.page = None
         self.context = None
         self.browser = None
         self.playwright = None
-        self.playwright_context = None
         self.initialized = False
-        logger.info(f"Browser closed for project: {self.project_name}")
+        logger.info("Browser closed for project: %s", self.project_name)
+
+class BrowserPool:
+    """Keeps pre-initialized browser instances ready to hand out
+    
+    Setting up a context and page takes several browser round trips (and the
+    first one launches Chromium), so idle instances are warmed in the
+    background and assigned to a project on checkout. Instances are never
+    returned to the pool, so no page state leaks between projects.
+    """
+    
+    def __init__(self, size: int = 0):
+        """Initialize the pool
+        
+        Args:
+            size: Number of idle browsers to keep warm (0 disables the pool)
+        """
+        self.size = size
+        self._idle: List[BrowserInstance] = []
+        self._warming: Set[asyncio.Task] = set()
+    
+    def fill(self):
+        """Start warming browsers until the pool is at its target size"""
+        while len(self._idle) + len(self._warming) < self.size:
+            task = asyncio.create_task(self._warm())
+            self._warming.add(task)
+            task.add_done_callback(self._warming.discard)
+    
+    async def _warm(self):
+        """Launch one browser and park it in the idle list"""
+        instance = BrowserInstance("pool")
+        try:
+            await instance.initialize()
+        except Exception:
+            logger.exception("Error warming pooled browser")
+            await instance.close()
+            return
+        self._idle.append(instance)
+    
+    async def acquire(self, project_name: str) -> BrowserInstance:
+        """Get an initialized browser instance for a project
+        
+        Args:
+            project_name: Project the browser will belong to
+        
+        Returns:
+            Initialized BrowserInstance, warm if one was available
+        """
+        if self._idle:
+            instance = self._idle.pop()
+            instance.project_name = project_name
+            logger.info("Using pooled browser for project: %s", project_name)
+        else:
+            instance = BrowserInstance(project_name)
+            await instance.initialize()
+        
+        # Replace what we just used
+        self.fill()
+        return instance
+    
+    async def close(self):
+        """Stop warming and close all idle browsers"""
+        for task in list(self._warming):
+            task.cancel()
+        if self._warming:
+            await asyncio.gather(*self._warming, return_exceptions=True)
+        
+        idle, self._idle = self._idle, []
+        await asyncio.gather(*(instance.close() for instance in idle))
+
+# Shared pool of warm browsers, sized by MCP_BROWSER_POOL_SIZE (disabled by default)
+browser_pool = BrowserPool(int(os.environ.get("MCP_BROWSER_POOL_SIZE", "0")))
+
+# Page audit run by the audit tools; takes the audit type as its argument.
+# The source is the same for every call, so the browser can reuse its
+# compiled script.
+AUDIT_JS = """
+(auditType) => {
+    // Simple audit implementation
+    const results = {};
+    
+    // Common function to check meta tags
+    const checkMetaTags = () => {
+        const metas = document.querySelectorAll('meta');
+        const metaInfo = Array.from(metas).map(meta => {
+            return {
+                name: meta.getAttribute('name'),
+                property: meta.getAttribute('property'),
+                content: meta.getAttribute('content')
+            };
+        });
+        return metaInfo;
+    };
+    
+    // Check basic page metrics
+    const getBasicMetrics = () => {
+        return {
+            title: document.title,
+            url: window.location.href,
+            loadTime: performance.now(),
+            docType: document.doctype ? document.doctype.name : 'unknown',
+            elementsCount: document.getElementsByTagName('*').length
+        };
+    };
+    
+    results.basicMetrics = getBasicMetrics();
+    
+    // Specific audit logic based on type
+    if (auditType === 'accessibility') {
+        // Basic accessibility checks
+        const imgWithoutAlt = document.querySelectorAll('img:not([alt])').length;
+        const formsWithoutLabels = document.querySelectorAll('input:not([id])').length;
+        const headingLevelsSkipped = (function() {
+            const headings = document.querySelectorAll('h1, h2, h3, h4, h5, h6');
+            const levels = new Set();
+            for (const heading of headings) {
+                levels.add(parseInt(heading.tagName[1]));
+            }
+            const ordered = Array.from(levels).sort();
+            let skipped = false;
+            for (let i = 1; i < ordered.length; i++) {
+                if (ordered[i] - ordered[i-1] > 1) {
+                    skipped = true;
+                    break;
+                }
+            }
+            return skipped;
+        })();
+        
+        results.accessibility = {
+            imgWithoutAlt,
+            formsWithoutLabels,
+            headingLevelsSkipped,
+            ariaUsage: document.querySelectorAll('[aria-*]').length,
+            colorContrast: 'Manual check required'
+        };
+    }
+    
+    if (auditType === 'performance') {
+        // Basic performance metrics
+        const perfEntries = performance.getEntriesByType('navigation');
+        results.performance = perfEntries.length > 0 ? perfEntries[0] : {
+            loadTime: performance.now(),
+            resourceCount: performance.getEntriesByType('resource').length,
+            scriptCount: document.querySelectorAll('script').length,
+            stylesheetCount: document.querySelectorAll('link[rel="stylesheet"]').length,
+            imageCount: document.querySelectorAll('img').length,
+            totalBytes: 'Cannot calculate without browser API'
+        };
+    }
+    
+    if (auditType === 'seo') {
+        // Basic SEO checks
+        results.seo = {
+            metaTags: checkMetaTags(),
+            headings: {
+                h1: document.querySelectorAll('h1').length,
+                h2: document.querySelectorAll('h2').length,
+                h3: document.querySelectorAll('h3').length
+            },
+            imgWithAlt: document.querySelectorAll('img[alt]').length,
+            links: document.querySelectorAll('a').length,
+            canonicalLink: document.querySelector('link[rel="canonical"]')?.href
+        };
+    }
+    
+    if (auditType === 'nextjs') {
+        // Check for NextJS specific patterns
+        const isNextJS = Boolean(
+            document.querySelector('#__next') || 
+            document.querySelector('script#__NEXT_DATA__')
+        );
+        
+        results.nextjs = {
+            isNextJS,
+            nextRoot: Boolean(document.querySelector('#__next')),
+            nextData: Boolean(document.querySelector('script#__NEXT_DATA__')),
+            headManager: Boolean(document.querySelector('noscript#__next_css__DO_NOT_USE__'))
+        };
+    }
+    
+    if (auditType === 'bestPractices') {
+        // Basic best practices checks
+        results.bestPractices = {
+            docType: document.doctype !== null,
+            viewport: document.querySelector('meta[name="viewport"]') !== null,
+            charset: document.querySelector('meta[charset]') !== null,
+            consoleErrors: typeof window.console_logs === 'object' ? 
+                window.console_logs.filter(log => log.type === 'error').length : 'Console logs not captured',
+            deprecatedHtml: document.querySelectorAll('center, font, frame, frameset, marquee').length,
+            inlineStyles: document.querySelectorAll('[style]').length,
+            inlineJS: document.querySelectorAll('*[onclick], *[onload], *[onsubmit]').length
+        };
+    }
+    
+    if (auditType === 'debugger') {
+        // Collect debug information
+        results.debugInfo = {
+            dom: {
+                bodyClasses: document.body.className,
+                bodyId: document.body.id,
+                elementCount: document.getElementsByTagName('*').length,
+                scripts: Array.from(document.scripts).map(s => s.src).filter(Boolean),
+                stylesheets: Array.from(document.styleSheets).length,
+                iframes: document.querySelectorAll('iframe').length
+            },
+            environment: {
+                userAgent: navigator.userAgent,
+                language: navigator.language,
+                screenSize: `${window.innerWidth}x${window.innerHeight}`,
+                devicePixelRatio: window.devicePixelRatio,
+                urlParams: Object.fromEntries(new URLSearchParams(window.location.search))
+            }
+        };
+    }
+    
+    if (auditType === 'audit') {
+        // Run all audits
+        // Accessibility
+        const imgWithoutAlt = document.querySelectorAll('img:not([alt])').length;
+        const formsWithoutLabels = document.querySelectorAll('input:not([id])').length;
+        
+        results.accessibility = {
+            imgWithoutAlt,
+            formsWithoutLabels,
+            ariaUsage: document.querySelectorAll('[aria-*]').length
+        };
+        
+        // Performance
+        const perfEntries = performance.getEntriesByType('navigation');
+        results.performance = perfEntries.length > 0 ? perfEntries[0] : {
+            loadTime: performance.now(),
+            resourceCount: performance.getEntriesByType('resource').length
+        };
+        
+        // SEO
+        results.seo = {
+            metaTags: checkMetaTags(),
+            headings: {
+                h1: document.querySelectorAll('h1').length,
+                h2: document.querySelectorAll('h2').length,
+                h3: document.querySelectorAll('h3').length
+            }
+        };
+        
+        // Best Practices
+        results.bestPractices = {
+            docType: document.doctype !== null,
+            viewport: document.querySelector('meta[name="viewport"]') !== null,
+            charset: document.querySelector('meta[charset]') !== null
+        };
+    }
+    
+    return results;
+}
+"""
 
 class Job:
     """Represents a browser operation job"""
     
+    __slots__ = (
+        "job_id", "project_name", "operation", "params", "status",
+        "result", "error", "created_at", "completed_at"
+    )
+    
     def __init__(self, job_id: str, project_name: str, operation: str, **kwargs):
         """Initialize a job
         
@@ -163,7 +426,7 @@ class Job:
         self.created_at = datetime.now().isoformat()
         self.completed_at = None
         
-        logger.info(f"Job created: {job_id} - {operation} for project {project_name}")
+        logger.info("Job created: %s - %s for project %s", job_id, operation, project_name)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert job to dictionary representation
@@ -192,7 +455,7 @@ class Job:
         self.status = "completed"
         self.result = result
         self.completed_at = datetime.now().isoformat()
-        logger.info(f"Job completed: {self.job_id}")
+        logger.info("Job completed: %s", self.job_id)
     
     def fail(self, error: str):
         """Mark the job as failed with error message
@@ -203,21 +466,25 @@ class Job:
         self.status = "failed"
         self.error = error
         self.completed_at = datetime.now().isoformat()
-        logger.error(f"Job failed: {self.job_id} - {error}")
+        logger.error("Job failed: %s - %s", self.job_id, error)
 
 class BrowserOperator:
     """Manages browser automation through MCP"""
     
+    __slots__ = ("project_name", "browser_instance", "agent", "jobs", "allow_domains", "_inflight", "_page_lock")
+    
     def __init__(self, project_name: Optional[str] = None):
         """Initialize the browser operator
         
         Args:
             project_name: Optional project name, will be auto-generated if not provided
         """
-        self.project_name = project_name or f"browser-{uuid.uuid4().hex[:8]}"
+        self.project_name = project_name or f"browser-{_random_id()[:8]}"
         self.browser_instance = None
         self.agent = None
         self.jobs: Dict[str, Job] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}  # Running operations by instruction
+        self._page_lock = asyncio.Lock()  # Held while creating, using or closing the browser
         self.allow_domains = [
             "about:blank", "google.com", "www.google.com", 
             "github.com", "www.github.com",
@@ -227,7 +494,12 @@ class BrowserOperator:
             "openai.com", "www.openai.com",
             "anthropic.com", "www.anthropic.com"
         ]
-        logger.info(f"Browser operator initialized with project name: {self.project_name}")
+        logger.info("Browser operator initialized with project name: %s", self.project_name)
+    
+    @property
+    def busy(self) -> bool:
+        """Whether a browser operation is running"""
+        return bool(self._inflight) or self._page_lock.locked()
     
     def _generate_job_id(self) -> str:
         """Generate a unique job ID
@@ -235,7 +507,17 @@ class BrowserOperator:
         Returns:
             Unique job ID string
         """
-        return f"job-{uuid.uuid4().hex}"
+        return f"job-{_random_id()}"
+    
+    async def _screenshot_base64(self) -> str:
+        """Capture the current viewport as a base64-encoded PNG
+        
+        Returns:
+            Base64 string of the PNG screenshot
+        """
+        screenshot = await self.browser_instance.page.screenshot()
+        # Base64 output is pure ASCII, which decodes faster than UTF-8
+        return base64.b64encode(screenshot).decode("ascii")
     
     async def create_browser(self) -> Dict[str, Any]:
         """Create a new browser instance
@@ -248,13 +530,15 @@ class BrowserOperator:
         self.jobs[job_id] = job
         
         try:
-            # Check if browser already exists
-            if self.browser_instance:
-                await self.close()
-            
-            # Create and initialize the browser
-            self.browser_instance = BrowserInstance(self.project_name)
-            await self.browser_instance.initialize()
+            # Concurrent creates take turns, so each one replaces the browser
+            # the previous one made instead of leaking it
+            async with self._page_lock:
+                # Check if browser already exists
+                if self.browser_instance:
+                    await self._close_browser()
+                
+                # Get an initialized browser, warm from the pool when possible
+                self.browser_instance = await browser_pool.acquire(self.project_name)
             
             # Complete the job successfully
             job.complete({"project_name": self.project_name})
@@ -279,10 +563,6 @@ class BrowserOperator:
         self.jobs[job_id] = job
         
         try:
-            # Ensure browser is initialized
-            if not self.browser_instance or not self.browser_instance.initialized:
-                raise ValueError("Browser not initialized. Call create_browser first.")
-            
             # Check URL safety
             parsed_url = urlparse(url)
             hostname = parsed_url.hostname
@@ -292,26 +572,31 @@ class BrowserOperator:
                 raise ValueError(f"Invalid URL: {url}")
             
             # Check if domain is allowed
-            is_allowed = any(hostname.endswith(domain) for domain in self.allow_domains)
+            is_allowed = hostname.endswith(tuple(self.allow_domains))
             if not is_allowed:
                 raise ValueError(f"Domain not allowed: {hostname}")
             
-            # Navigate to URL
-            logger.info(f"Navigating to URL: {url}")
-            await self.browser_instance.page.goto(url, wait_until="domcontentloaded")
-            
-            # Take screenshot after navigation
-            screenshot = await self.browser_instance.page.screenshot()
-            screenshot_base64 = base64.b64encode(screenshot).decode("utf-8")
+            # Navigate to URL, waiting for any operation already driving the page
+            async with self._page_lock:
+                # Ensure browser is initialized
+                if not self.browser_instance or not self.browser_instance.initialized:
+                    raise ValueError("Browser not initialized. Call create_browser first.")
+                
+                logger.info("Navigating to URL: %s", url)
+                await self.browser_instance.page.goto(url, wait_until="domcontentloaded")
+                
+                # Take screenshot after navigation
+                screenshot_base64 = await self._screenshot_base64()
+                current_url = self.browser_instance.page.url
             
             # Complete the job successfully
             job.complete({
-                "current_url": self.browser_instance.page.url,
+                "current_url": current_url,
                 "screenshot": screenshot_base64
             })
             
         except Exception as e:
-            logger.exception(f"Error navigating to {url}")
+            logger.exception("Error navigating to %s", url)
             job.fail(str(e))
         
         return {"job_id": job_id}
@@ -319,6 +604,42 @@ class BrowserOperator:
     async def operate_browser(self, instruction: str) -> Dict[str, Any]:
         """Operate the browser based on a natural language instruction
         
+        A request for an instruction that is already running on this browser
+        (such as a client retry) waits for that run and gets its job instead
+        of performing the actions a second time.
+        
+        Args:
+            instruction: Natural language instruction to execute
+        
+        Returns:
+            Dict with job information
+        """
+        task = self._inflight.get(instruction)
+        # A finished task stays in _inflight until its done callback runs;
+        # don't hand its old job back for a new request
+        if task is None or task.done():
+            task = asyncio.create_task(self._operate_browser(instruction))
+            self._inflight[instruction] = task
+            task.add_done_callback(lambda done: self._forget_inflight(instruction, done))
+        else:
+            logger.info("Joining in-flight operation for instruction: %s", instruction)
+        
+        # Shield the shared run from any one caller being cancelled
+        return await asyncio.shield(task)
+    
+    def _forget_inflight(self, instruction: str, task: asyncio.Task):
+        """Drop a finished operation unless a newer run has replaced it
+        
+        Args:
+            instruction: Instruction the task was running
+            task: The finished task
+        """
+        if self._inflight.get(instruction) is task:
+            del self._inflight[instruction]
+    
+    async def _operate_browser(self, instruction: str) -> Dict[str, Any]:
+        """Run an instruction as a new operate job
+        
         Args:
             instruction: Natural language instruction to execute
             
@@ -330,18 +651,20 @@ class BrowserOperator:
         self.jobs[job_id] = job
         
         try:
-            # Ensure browser is initialized
-            if not self.browser_instance or not self.browser_instance.initialized:
-                raise ValueError("Browser not initialized. Call create_browser first.")
+            # Process the instruction using CUA. Different instructions for the
+            # same browser take turns rather than interleaving their actions.
+            async with self._page_lock:
+                # Ensure browser is initialized
+                if not self.browser_instance or not self.browser_instance.initialized:
+                    raise ValueError("Browser not initialized. Call create_browser first.")
                 
-            # Process the instruction using CUA
-            result = await self.process_message(instruction)
+                result = await self.process_message(instruction)
             
             # Complete the job successfully
             job.complete(result)
             
         except Exception as e:
-            logger.exception(f"Error operating browser with instruction: {instruction}")
+            logger.exception("Error operating browser with instruction: %s", instruction)
             job.fail(str(e))
         
         return {"job_id": job_id}
@@ -355,12 +678,12 @@ class BrowserOperator:
         Returns:
             Dict with results of the operation
         """
-        logger.info(f"Processing instruction: {instruction}")
+        logger.info("Processing instruction: %s", instruction)
         
         # Initialize CUA agent if not already done
         if not self.agent:
             # Create computer instance that will communicate with our browser
-            logger.info(f"Creating computer instance with headless={self.browser_instance.headless}")
+            logger.info("Creating computer instance with headless=%s", self.browser_instance.headless)
             computer = AsyncLocalPlaywrightComputer(
                 headless=self.browser_instance.headless,
                 width=self.browser_instance.dimensions[0],
@@ -381,11 +704,15 @@ class BrowserOperator:
         try:
             logger.info("Running CUA agent")
             result = await self.agent.run(instruction, max_steps=20)
-            logger.info(f"Agent completed with success={result.success}")
+            logger.info("Agent completed with success=%s", result.success)
             
-            # Take final screenshot
-            screenshot = await self.browser_instance.page.screenshot()
-            screenshot_base64 = base64.b64encode(screenshot).decode("utf-8")
+            # Take final screenshot and collect console logs together; both
+            # only read page state, so the round trips can overlap. The caller
+            # holds the page lock, so use the unlocked reader.
+            screenshot_base64, console_logs = await asyncio.gather(
+                self._screenshot_base64(),
+                self._read_console_logs()
+            )
             
             # Create GIF from screen captures if available
             gif_path = None
@@ -394,16 +721,14 @@ class BrowserOperator:
                     gif_dir = Path("./screenshots")
                     gif_dir.mkdir(exist_ok=True)
                     gif_path = str(gif_dir / f"{self.project_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.gif")
-                    self.agent.create_gif(gif_path)
+                    # Encoding and writing every frame is slow; keep it off the event loop
+                    await asyncio.to_thread(self.agent.create_gif, gif_path)
                 except Exception as e:
-                    logger.error(f"Error creating GIF: {e}")
+                    logger.error("Error creating GIF: %s", e)
             
             # Get current URL
             current_url = self.browser_instance.page.url
             
-            # Get console logs
-            console_logs = await self.get_console_logs()
-            
             # Return results
             return {
                 "success": result.success,
@@ -430,12 +755,9 @@ class BrowserOperator:
         self.jobs[job_id] = job
         
         try:
-            if self.browser_instance:
-                await self.browser_instance.close()
-                self.browser_instance = None
-            
-            # Reset agent
-            self.agent = None
+            # Wait for any operation still using the browser
+            async with self._page_lock:
+                await self._close_browser()
             
             # Complete the job successfully
             job.complete({"project_name": self.project_name, "status": "closed"})
@@ -446,6 +768,18 @@ class BrowserOperator:
         
         return {"job_id": job_id}
     
+    async def _close_browser(self):
+        """Close the browser instance and reset the agent
+        
+        Callers must hold the page lock.
+        """
+        if self.browser_instance:
+            await self.browser_instance.close()
+            self.browser_instance = None
+        
+        # Reset agent
+        self.agent = None
+    
     def get_job_status(self, job_id: str) -> Dict[str, Any]:
         """Get the status of a job
         
@@ -499,18 +833,22 @@ class BrowserOperator:
             
             note_file = notes_dir / f"{self.project_name}_{name.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
             
-            with open(note_file, "w") as f:
-                f.write(f"Title: {name}\n")
-                f.write(f"Date: {datetime.now().isoformat()}\n")
-                f.write(f"Project: {self.project_name}\n")
-                f.write("-" * 40 + "\n")
-                f.write(content)
+            note_text = (
+                f"Title: {name}\n"
+                f"Date: {datetime.now().isoformat()}\n"
+                f"Project: {self.project_name}\n"
+                + "-" * 40 + "\n"
+                + content
+            )
+            
+            # Write from a worker thread so a slow disk doesn't hold up the event loop
+            await asyncio.to_thread(note_file.write_text, note_text)
             
             # Complete the job successfully
             job.complete({"note_file": str(note_file)})
             
         except Exception as e:
-            logger.exception(f"Error adding note: {name}")
+            logger.exception("Error adding note: %s", name)
             job.fail(str(e))
         
         return {"job_id": job_id}
@@ -520,6 +858,16 @@ class BrowserOperator:
     async def get_console_logs(self) -> List[Dict[str, Any]]:
         """Get browser console logs
         
+        Returns:
+            List of console log entries
+        """
+        # Wait for any operation still driving the page
+        async with self._page_lock:
+            return await self._read_console_logs()
+    
+    async def _read_console_logs(self) -> List[Dict[str, Any]]:
+        """Read browser console logs; callers must hold the page lock
+        
         Returns:
             List of console log entries
         """
@@ -567,26 +915,28 @@ class BrowserOperator:
         Returns:
             List of network log entries
         """
-        if not self.browser_instance or not self.browser_instance.initialized:
-            return [{"error": "Browser not initialized"}]
-        
-        try:
-            # Using playwright to get network logs
-            page = self.browser_instance.page
-            
-            # Collect network logs using evaluate
-            result = await page.evaluate("""
-            () => {
-                return window.network_logs || [];
-            }
-            """)
+        # Wait for any operation still driving the page
+        async with self._page_lock:
+            if not self.browser_instance or not self.browser_instance.initialized:
+                return [{"error": "Browser not initialized"}]
             
-            if result:
-                return result
-            return []
-        except Exception as e:
-            logger.exception("Error getting network logs")
-            return [{"error": str(e)}]
+            try:
+                # Using playwright to get network logs
+                page = self.browser_instance.page
+                
+                # Collect network logs using evaluate
+                result = await page.evaluate("""
+                () => {
+                    return window.network_logs || [];
+                }
+                """)
+                
+                if result:
+                    return result
+                return []
+            except Exception as e:
+                logger.exception("Error getting network logs")
+                return [{"error": str(e)}]
     
     async def get_network_errors(self) -> List[Dict[str, Any]]:
         """Get browser network errors
@@ -606,18 +956,19 @@ class BrowserOperator:
         Returns:
             Dict with screenshot data
         """
-        if not self.browser_instance or not self.browser_instance.initialized:
-            return {"error": "Browser not initialized"}
-        
-        try:
-            # Take screenshot
-            screenshot = await self.browser_instance.page.screenshot()
-            screenshot_base64 = base64.b64encode(screenshot).decode("utf-8")
+        # Wait for any operation still driving the page
+        async with self._page_lock:
+            if not self.browser_instance or not self.browser_instance.initialized:
+                return {"error": "Browser not initialized"}
             
-            return {"screenshot": screenshot_base64}
-        except Exception as e:
-            logger.exception("Error taking screenshot")
-            return {"error": str(e)}
+            try:
+                # Take screenshot
+                screenshot_base64 = await self._screenshot_base64()
+                
+                return {"screenshot": screenshot_base64}
+            except Exception as e:
+                logger.exception("Error taking screenshot")
+                return {"error": str(e)}
     
     async def get_selected_element(self) -> Dict[str, Any]:
         """Get information about the currently selected element
@@ -625,46 +976,48 @@ class BrowserOperator:
         Returns:
             Dict with element information
         """
-        if not self.browser_instance or not self.browser_instance.initialized:
-            return {"error": "Browser not initialized"}
-        
-        try:
-            # Using playwright to get selected element
-            page = self.browser_instance.page
+        # Wait for any operation still driving the page
+        async with self._page_lock:
+            if not self.browser_instance or not self.browser_instance.initialized:
+                return {"error": "Browser not initialized"}
             
-            # Get information about currently focused element
-            element_info = await page.evaluate("""
-            () => {
-                const activeElement = document.activeElement;
-                if (!activeElement || activeElement === document.body) {
-                    return { found: false };
-                }
+            try:
+                # Using playwright to get selected element
+                page = self.browser_instance.page
                 
-                const rect = activeElement.getBoundingClientRect();
-                return {
-                    found: true,
-                    tag: activeElement.tagName.toLowerCase(),
-                    id: activeElement.id,
-                    className: activeElement.className,
-                    text: activeElement.textContent?.trim().substring(0, 100) || "",
-                    attributes: Array.from(activeElement.attributes).map(attr => ({ 
-                        name: attr.name, 
-                        value: attr.value 
-                    })),
-                    position: {
-                        x: rect.left,
-                        y: rect.top,
-                        width: rect.width,
-                        height: rect.height
+                # Get information about currently focused element
+                element_info = await page.evaluate("""
+                () => {
+                    const activeElement = document.activeElement;
+                    if (!activeElement || activeElement === document.body) {
+                        return { found: false };
                     }
-                };
-            }
-            """)
-            
-            return element_info
-        except Exception as e:
-            logger.exception("Error getting selected element")
-            return {"error": str(e)}
+                    
+                    const rect = activeElement.getBoundingClientRect();
+                    return {
+                        found: true,
+                        tag: activeElement.tagName.toLowerCase(),
+                        id: activeElement.id,
+                        className: activeElement.className,
+                        text: activeElement.textContent?.trim().substring(0, 100) || "",
+                        attributes: Array.from(activeElement.attributes).map(attr => ({ 
+                            name: attr.name, 
+                            value: attr.value 
+                        })),
+                        position: {
+                            x: rect.left,
+                            y: rect.top,
+                            width: rect.width,
+                            height: rect.height
+                        }
+                    };
+                }
+                """)
+                
+                return element_info
+            except Exception as e:
+                logger.exception("Error getting selected element")
+                return {"error": str(e)}
     
     async def wipe_logs(self) -> Dict[str, str]:
         """Wipe browser logs from memory
@@ -672,23 +1025,25 @@ class BrowserOperator:
         Returns:
             Dict with status message
         """
-        if not self.browser_instance or not self.browser_instance.initialized:
-            return {"error": "Browser not initialized"}
-        
-        try:
-            # Clear logs using evaluate
-            await self.browser_instance.page.evaluate("""
-            () => {
-                window.console_logs = [];
-                window.network_logs = [];
-                console.log("Logs wiped");
-            }
-            """)
+        # Wait for any operation still driving the page
+        async with self._page_lock:
+            if not self.browser_instance or not self.browser_instance.initialized:
+                return {"error": "Browser not initialized"}
             
-            return {"status": "Logs wiped successfully"}
-        except Exception as e:
-            logger.exception("Error wiping logs")
-            return {"error": str(e)}
+            try:
+                # Clear logs using evaluate
+                await self.browser_instance.page.evaluate("""
+                () => {
+                    window.console_logs = [];
+                    window.network_logs = [];
+                    console.log("Logs wiped");
+                }
+                """)
+                
+                return {"status": "Logs wiped successfully"}
+            except Exception as e:
+                logger.exception("Error wiping logs")
+                return {"error": str(e)}
     
     # Audit tools
     
@@ -701,206 +1056,26 @@ class BrowserOperator:
         Returns:
             Dict with audit results
         """
-        if not self.browser_instance or not self.browser_instance.initialized:
-            return {"error": "Browser not initialized"}
-        
-        try:
-            # Using a simplified audit mechanism
-            page = self.browser_instance.page
+        # Wait for any operation still driving the page
+        async with self._page_lock:
+            if not self.browser_instance or not self.browser_instance.initialized:
+                return {"error": "Browser not initialized"}
             
-            # Run appropriate audit based on type
-            audit_script = f"""
-            () => {{
-                // Simple audit implementation
-                const results = {{}};
-                
-                // Common function to check meta tags
-                const checkMetaTags = () => {{
-                    const metas = document.querySelectorAll('meta');
-                    const metaInfo = Array.from(metas).map(meta => {{
-                        return {{
-                            name: meta.getAttribute('name'),
-                            property: meta.getAttribute('property'),
-                            content: meta.getAttribute('content')
-                        }};
-                    }});
-                    return metaInfo;
-                }};
-                
-                // Check basic page metrics
-                const getBasicMetrics = () => {{
-                    return {{
-                        title: document.title,
-                        url: window.location.href,
-                        loadTime: performance.now(),
-                        docType: document.doctype ? document.doctype.name : 'unknown',
-                        elementsCount: document.getElementsByTagName('*').length
-                    }};
-                }};
-                
-                results.basicMetrics = getBasicMetrics();
-                
-                // Specific audit logic based on type
-                if ('{audit_type}' === 'accessibility') {{
-                    // Basic accessibility checks
-                    const imgWithoutAlt = document.querySelectorAll('img:not([alt])').length;
-                    const formsWithoutLabels = document.querySelectorAll('input:not([id])').length;
-                    const headingLevelsSkipped = (function() {{
-                        const headings = document.querySelectorAll('h1, h2, h3, h4, h5, h6');
-                        const levels = new Set();
-                        for (const heading of headings) {{
-                            levels.add(parseInt(heading.tagName[1]));
-                        }}
-                        const ordered = Array.from(levels).sort();
-                        let skipped = false;
-                        for (let i = 1; i < ordered.length; i++) {{
-                            if (ordered[i] - ordered[i-1] > 1) {{
-                                skipped = true;
-                                break;
-                            }}
-                        }}
-                        return skipped;
-                    }})();
-                    
-                    results.accessibility = {{
-                        imgWithoutAlt,
-                        formsWithoutLabels,
-                        headingLevelsSkipped,
-                        ariaUsage: document.querySelectorAll('[aria-*]').length,
-                        colorContrast: 'Manual check required'
-                    }};
-                }}
-                
-                if ('{audit_type}' === 'performance') {{
-                    // Basic performance metrics
-                    const perfEntries = performance.getEntriesByType('navigation');
-                    results.performance = perfEntries.length > 0 ? perfEntries[0] : {{
-                        loadTime: performance.now(),
-                        resourceCount: performance.getEntriesByType('resource').length,
-                        scriptCount: document.querySelectorAll('script').length,
-                        stylesheetCount: document.querySelectorAll('link[rel="stylesheet"]').length,
-                        imageCount: document.querySelectorAll('img').length,
-                        totalBytes: 'Cannot calculate without browser API'
-                    }};
-                }}
-                
-                if ('{audit_type}' === 'seo') {{
-                    // Basic SEO checks
-                    results.seo = {{
-                        metaTags: checkMetaTags(),
-                        headings: {{
-                            h1: document.querySelectorAll('h1').length,
-                            h2: document.querySelectorAll('h2').length,
-                            h3: document.querySelectorAll('h3').length
-                        }},
-                        imgWithAlt: document.querySelectorAll('img[alt]').length,
-                        links: document.querySelectorAll('a').length,
-                        canonicalLink: document.querySelector('link[rel="canonical"]')?.href
-                    }};
-                }}
-                
-                if ('{audit_type}' === 'nextjs') {{
-                    // Check for NextJS specific patterns
-                    const isNextJS = Boolean(
-                        document.querySelector('#__next') || 
-                        document.querySelector('script#__NEXT_DATA__')
-                    );
-                    
-                    results.nextjs = {{
-                        isNextJS,
-                        nextRoot: Boolean(document.querySelector('#__next')),
-                        nextData: Boolean(document.querySelector('script#__NEXT_DATA__')),
-                        headManager: Boolean(document.querySelector('noscript#__next_css__DO_NOT_USE__'))
-                    }};
-                }}
-                
-                if ('{audit_type}' === 'bestPractices') {{
-                    // Basic best practices checks
-                    results.bestPractices = {{
-                        docType: document.doctype !== null,
-                        viewport: document.querySelector('meta[name="viewport"]') !== null,
-                        charset: document.querySelector('meta[charset]') !== null,
-                        consoleErrors: typeof window.console_logs === 'object' ? 
-                            window.console_logs.filter(log => log.type === 'error').length : 'Console logs not captured',
-                        deprecatedHtml: document.querySelectorAll('center, font, frame, frameset, marquee').length,
-                        inlineStyles: document.querySelectorAll('[style]').length,
-                        inlineJS: document.querySelectorAll('*[onclick], *[onload], *[onsubmit]').length
-                    }};
-                }}
+            try:
+                # Using a simplified audit mechanism
+                page = self.browser_instance.page
                 
-                if ('{audit_type}' === 'debugger') {{
-                    // Collect debug information
-                    results.debugInfo = {{
-                        dom: {{
-                            bodyClasses: document.body.className,
-                            bodyId: document.body.id,
-                            elementCount: document.getElementsByTagName('*').length,
-                            scripts: Array.from(document.scripts).map(s => s.src).filter(Boolean),
-                            stylesheets: Array.from(document.styleSheets).length,
-                            iframes: document.querySelectorAll('iframe').length
-                        }},
-                        environment: {{
-                            userAgent: navigator.userAgent,
-                            language: navigator.language,
-                            screenSize: `${{window.innerWidth}}x${{window.innerHeight}}`,
-                            devicePixelRatio: window.devicePixelRatio,
-                            urlParams: Object.fromEntries(new URLSearchParams(window.location.search))
-                        }}
-                    }};
-                }}
+                # Run the audit script for this audit type
+                audit_results = await page.evaluate(AUDIT_JS, audit_type)
                 
-                if ('{audit_type}' === 'audit') {{
-                    // Run all audits
-                    // Accessibility
-                    const imgWithoutAlt = document.querySelectorAll('img:not([alt])').length;
-                    const formsWithoutLabels = document.querySelectorAll('input:not([id])').length;
-                    
-                    results.accessibility = {{
-                        imgWithoutAlt,
-                        formsWithoutLabels,
-                        ariaUsage: document.querySelectorAll('[aria-*]').length
-                    }};
-                    
-                    // Performance
-                    const perfEntries = performance.getEntriesByType('navigation');
-                    results.performance = perfEntries.length > 0 ? perfEntries[0] : {{
-                        loadTime: performance.now(),
-                        resourceCount: performance.getEntriesByType('resource').length
-                    }};
-                    
-                    // SEO
-                    results.seo = {{
-                        metaTags: checkMetaTags(),
-                        headings: {{
-                            h1: document.querySelectorAll('h1').length,
-                            h2: document.querySelectorAll('h2').length,
-                            h3: document.querySelectorAll('h3').length
-                        }}
-                    }};
-                    
-                    // Best Practices
-                    results.bestPractices = {{
-                        docType: document.doctype !== null,
-                        viewport: document.querySelector('meta[name="viewport"]') !== null,
-                        charset: document.querySelector('meta[charset]') !== null
-                    }};
-                }}
+                # Add timestamp
+                audit_results["timestamp"] = datetime.now().isoformat()
+                audit_results["url"] = page.url
                 
-                return results;
-            }}
-            """
-            
-            # Execute the audit script
-            audit_results = await page.evaluate(audit_script)
-            
-            # Add timestamp
-            audit_results["timestamp"] = datetime.now().isoformat()
-            audit_results["url"] = page.url
-            
-            return audit_results
-        except Exception as e:
-            logger.exception(f"Error running {audit_type} audit")
-            return {"error": str(e)}
+                return audit_results
+            except Exception as e:
+                logger.exception("Error running %s audit", audit_type)
+                return {"error": str(e)}
     
     async def run_accessibility_audit(self) -> Dict[str, Any]:
         """Run an accessibility audit on the current page
@@ -3,15 +3,17 @@
 Agent implementation for the OpenAI Computer Use Agent (CUA)
 """
 import os
+import re
 import json
 import base64
-import io
 import asyncio
+import weakref
 import aiohttp
 import imageio.v2 as imageio
 from typing import List, Dict, Any
 from pathlib import Path
 from urllib.parse import urlparse
+from mcp_operator import jsonutil
 from .computer import AsyncComputer
 
 # Pretty print JSON objects
@@ -19,9 +21,35 @@ def pp(obj):
     """Pretty print JSON objects"""
     print(json.dumps(obj, indent=4))
 
+# HTTP sessions keyed by event loop, shared by all agents on a loop so API
+# calls reuse pooled keep-alive connections instead of paying a TLS handshake
+# per agent. A session is bound to the loop it was created on.
+_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+
+def get_session() -> aiohttp.ClientSession:
+    """Return the running loop's shared HTTP session, creating it on first use"""
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        session = _sessions[loop] = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300, keepalive_timeout=75)
+        )
+    return session
+
+async def close_session():
+    """Close the running loop's shared HTTP session"""
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
+
 # Create OpenAI Responses API request
 async def create_response(**kwargs):
-    """Create a response from the OpenAI API using aiohttp with retry logic"""
+    """Create a response from the OpenAI API using aiohttp with retry logic
+    
+    Uses the running loop's shared HTTP session.
+    """
+    session = get_session()
+    
     api_key = os.getenv('OPENAI_API_KEY')
     url = "https://api.openai.com/v1/responses"
     headers = {
@@ -30,39 +58,42 @@ async def create_response(**kwargs):
         "Openai-beta": "responses=v1",
     }
     
+    # Encode the request once; it carries a base64 screenshot and is reused
+    # as-is on retries
+    body = jsonutil.dumps(kwargs)
+    
     max_retries = 3
     retry_delay = 2  # seconds
     
     for attempt in range(max_retries):
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, headers=headers, json=kwargs) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        print(f"Error: {response.status} {error_text}")
-                        
-                        # Check for rate limit errors
-                        if response.status == 429 or "rate limit" in error_text.lower():
-                            wait_time = retry_delay * (2 ** attempt)  # Exponential backoff
-                            print(f"Rate limit hit. Waiting {wait_time}s before retry {attempt+1}/{max_retries}...")
-                            await asyncio.sleep(wait_time)
-                            continue
-                        
-                        return {"error": error_text}
+            async with session.post(url, headers=headers, data=body) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    print(f"Error: {response.status} {error_text}")
                     
-                    response_json = await response.json()
-                    
-                    # Verify response has expected structure
-                    if "error" in response_json:
-                        print(f"API returned error: {response_json['error']}")
-                        # Check if it's a rate limit error
-                        if "rate limit" in str(response_json['error']).lower():
-                            wait_time = retry_delay * (2 ** attempt)
-                            print(f"Rate limit hit. Waiting {wait_time}s before retry {attempt+1}/{max_retries}...")
-                            await asyncio.sleep(wait_time)
-                            continue
+                    # Check for rate limit errors
+                    if response.status == 429 or "rate limit" in error_text.lower():
+                        wait_time = retry_delay * (2 ** attempt)  # Exponential backoff
+                        print(f"Rate limit hit. Waiting {wait_time}s before retry {attempt+1}/{max_retries}...")
+                        await asyncio.sleep(wait_time)
+                        continue
                     
-                    return response_json
+                    return {"error": error_text}
+                
+                response_json = jsonutil.loads(await response.read())
+                
+                # Verify response has expected structure
+                if "error" in response_json:
+                    print(f"API returned error: {response_json['error']}")
+                    # Check if it's a rate limit error
+                    if "rate limit" in str(response_json['error']).lower():
+                        wait_time = retry_delay * (2 ** attempt)
+                        print(f"Rate limit hit. Waiting {wait_time}s before retry {attempt+1}/{max_retries}...")
+                        await asyncio.sleep(wait_time)
+                        continue
+                
+                return response_json
         except Exception as e:
             print(f"Network error on attempt {attempt+1}/{max_retries}: {str(e)}")
             if attempt < max_retries - 1:
@@ -76,15 +107,67 @@ async def create_response(**kwargs):
     # If we exhausted all retries
     return {"error": "Max retries reached"}
 
+# Patterns used to find the start URL in a task description, compiled once
+URL_LINE_RE = re.compile(r"URL:\s*(https?://[^\s\n]+)")
+URL_PATTERNS = [
+    re.compile(pattern) for pattern in (
+        r"Navigate to (https?://[^\s]+)",
+        r"Go to (https?://[^\s]+)",
+        r"Visit (https?://[^\s]+)",
+        r"Open (https?://[^\s]+)",
+        r"Access (https?://[^\s]+)",
+        r"URL: (https?://[^\s]+)",
+        r"Navigate to the URL ([^\s]+)"
+    )
+]
+BASE_URL_RE = re.compile(r"base_url:\s*([^\s\n]+)", re.IGNORECASE)
+ANY_URL_RE = re.compile(r'https?://[^\s\'"]+')
+
+# Reasoning section of a message, up to the [ACTION] tag or the end
+REASONING_RE = re.compile(r"\[REASONING\](.*?)(?:\[ACTION\]|$)", re.DOTALL)
+
+# Prompt sent with the new screenshot on each step after the first
+FOLLOW_UP_PROMPT = """
+Looking at the current screen, please evaluate the test status.
+
+Test requirements:
+{task}
+
+Please write your thought process for determining if this is a PASS or a FAIL, considering:
+1. Which requirements have been completed successfully?
+2. Which requirements (if any) have not been completed successfully?
+3. Are there any blocking issues that prevent completion?
+
+IMPORTANT: For each action you take, please always provide your reasoning. Format your actions like this:
+[REASONING] I'm clicking this button because it appears to be the login button that will take me to the dashboard.
+[ACTION] *click on login button*
+
+After your analysis, end your response with a single paragraph starting with exactly "Test PASSED." or "Test FAILED." followed by a brief explanation of the key results.
+"""
+
 # Check if a URL is allowed by domain rules
 def check_allowed_url(url: str, allowed_domains: List[str]) -> bool:
     """Check if URL is in allowed domains list"""
     hostname = urlparse(url).hostname or ""
-    return any(hostname.endswith(domain) for domain in allowed_domains)
+    return hostname.endswith(tuple(allowed_domains))
 
 class Agent:
     """Agent to manage the CUA loop and interaction with the Computer"""
     
+    # Default reasoning shown for each action type when the model gives none
+    ACTION_REASONING = {
+        "click": "Clicking on an element to interact with the page interface. This helps navigate through the content to find the requested information.",
+        "double_click": "Double-clicking on an element to open or expand content that may contain relevant information.",
+        "type": "Typing text to provide input needed for this search. This text will help narrow down the results to find the specific information requested.",
+        "keypress": "Submitting the search query to find information about the requested topic. This will execute the search and retrieve relevant results.",
+        "scroll": "Scrolling the page to view additional content that might contain the requested information. Scrolling allows examining more search results or content.",
+        "goto": "Navigating to a website to find information about the requested topic. This website likely contains relevant data or search capabilities needed.",
+        "wait": "Waiting for page to respond while the page loads the requested information. This ensures all content is properly displayed before proceeding.",
+        "move": "Moving the cursor to prepare for the next interaction. Positioning the cursor is necessary before clicking or selecting content.",
+        "drag": "Adjusting the view or interacting with content by dragging. This helps reveal or organize information in a more useful way.",
+        "screenshot": "Capturing a screenshot to record the visual information displayed. This preserves the current state of the information for reference."
+    }
+    
     def __init__(
         self,
         model="computer-use-preview",
@@ -118,21 +201,8 @@ class Agent:
     # Define a function to generate contextual reasoning for actions
     def generate_action_reasoning(self, action_type, action_args):
         """Generate contextual reasoning for different action types"""
-        action_reasoning = {
-            "click": "Clicking on an element to interact with the page interface. This helps navigate through the content to find the requested information.",
-            "double_click": "Double-clicking on an element to open or expand content that may contain relevant information.",
-            "type": "Typing text to provide input needed for this search. This text will help narrow down the results to find the specific information requested.",
-            "keypress": "Submitting the search query to find information about the requested topic. This will execute the search and retrieve relevant results.",
-            "scroll": "Scrolling the page to view additional content that might contain the requested information. Scrolling allows examining more search results or content.",
-            "goto": "Navigating to a website to find information about the requested topic. This website likely contains relevant data or search capabilities needed.",
-            "wait": "Waiting for page to respond while the page loads the requested information. This ensures all content is properly displayed before proceeding.",
-            "move": "Moving the cursor to prepare for the next interaction. Positioning the cursor is necessary before clicking or selecting content.",
-            "drag": "Adjusting the view or interacting with content by dragging. This helps reveal or organize information in a more useful way.",
-            "screenshot": "Capturing a screenshot to record the visual information displayed. This preserves the current state of the information for reference."
-        }
-        
         # Get default reasoning for this action type
-        base_reasoning = action_reasoning.get(action_type, f"Performing {action_type} action to find the requested information.")
+        base_reasoning = self.ACTION_REASONING.get(action_type, f"Performing {action_type} action to find the requested information.")
         
         # Add specific details based on action type and args
         if action_type == "click":
@@ -196,8 +266,7 @@ class Agent:
                     message_text = content["text"]
                     
                     # Look for [REASONING] tags in the message
-                    import re
-                    reasoning_match = re.search(r'\[REASONING\](.*?)(?:\[ACTION\]|$)', message_text, re.DOTALL)
+                    reasoning_match = REASONING_RE.search(message_text)
                     if reasoning_match:
                         reasoning_text = reasoning_match.group(1).strip()
                         # Store reasoning text to reference with the next action
@@ -264,16 +333,10 @@ class Agent:
             method = getattr(self.computer, action_type)
             await method(**action_args)
             
-            # Add the action to conversation history
-            self.conversation_history.append({
-                "role": "assistant",
-                "content": f"{action_type}({action_args})",
-                "type": "action"  # Identify as an action
-            })
-            
-            # Capture the screenshot
-            screenshot_base64 = await self.computer.screenshot()
-            self.screen_captures.append(imageio.imread(io.BytesIO(base64.b64decode(screenshot_base64))))
+            # Capture the screenshot, keeping the encoded image for the GIF
+            image = await self.computer.screenshot_bytes()
+            self.screen_captures.append(image)
+            screenshot_base64 = base64.b64encode(image).decode("ascii")
             
             # Prepare response
             call_output = {
@@ -282,7 +345,7 @@ class Agent:
                 "acknowledged_safety_checks": [],
                 "output": {
                     "type": "input_image",
-                    "image_url": f"data:image/png;base64,{screenshot_base64}",
+                    "image_url": f"data:{self.computer.screenshot_mime_type};base64,{screenshot_base64}",
                 },
             }
             
@@ -309,7 +372,9 @@ class Agent:
         
         # Keep looping until we get a final response
         while new_items[-1].get("role") != "assistant" if new_items else True:
-            self.debug_print(input_items + new_items)
+            # Only build the combined list when it will be printed
+            if self.debug:
+                self.debug_print(input_items + new_items)
             
             # Only print new user messages, not the initial instructions that get repeated
             if print_steps and len(new_items) > 0:  # Only print for follow-up turns, not the first turn
@@ -493,17 +558,15 @@ class Agent:
         
         # Set up computer with auth state
         async with self.computer as computer:
-            # Navigate to a blank page first to establish the browser context
-            await computer.goto("about:blank")
-            
             # Extract URL from task - we'll navigate to it after setting cookies
             url = self.extract_url_from_task(task)
             
             # Apply auth state using the direct Playwright approach
             if auth_state:
                 try:
-                    # Get the current context
-                    context = computer._browser.contexts[0]
+                    # Use this computer's own context; the browser is shared and
+                    # its other contexts belong to other projects
+                    context = computer._context
                     
                     # Apply the auth state directly to the browser context
                     # This uses the exact same format that was saved by auth_setup.py
@@ -565,13 +628,14 @@ class Agent:
                     print("Navigation complete, waiting for page to fully load...")
                 except Exception as e:
                     print(f"Navigation error: {e}")
-            
-            # Wait for page to fully load and stabilize
-            await computer.wait(5000)  # Wait time for complex pages
+                
+                # Wait for the page to finish loading, up to 5 seconds for complex pages
+                await computer.wait_for_load(5000)
             
             # Capture initial screenshot
-            screenshot_base64 = await computer.screenshot()
-            self.screen_captures.append(imageio.imread(io.BytesIO(base64.b64decode(screenshot_base64))))
+            image = await computer.screenshot_bytes()
+            self.screen_captures.append(image)
+            screenshot_base64 = base64.b64encode(image).decode("ascii")
             
             # Store conversation in history
             self.conversation_history = []
@@ -586,7 +650,7 @@ class Agent:
                     },
                     {
                         "type": "input_image",
-                        "image_url": f"data:image/png;base64,{screenshot_base64}"
+                        "image_url": f"data:{computer.screenshot_mime_type};base64,{screenshot_base64}"
                     }
                 ]
             }
@@ -635,9 +699,6 @@ class Agent:
                             if "accounts.google.com" in current_url or "login" in current_url:
                                 print("Detected login page - trying to find account selector")
                                 
-                                # Take a screenshot to analyze the login page
-                                screenshot = await computer.screenshot()
-                                
                                 # Try to bypass Google login using auth tokens and local storage
                                 bypass_login_script = """
                                 () => {
@@ -773,9 +834,6 @@ class Agent:
                                 # Check if we're still on a login page
                                 current_url_after = await computer.get_current_url()
                                 if "accounts.google.com" in current_url_after:
-                                    # Take another screenshot to see what changed
-                                    screenshot = await computer.screenshot()
-                                    
                                     # Try buttons that might appear in next page
                                     try:
                                         next_button_script = """
@@ -836,6 +894,9 @@ class Agent:
                         except Exception as e:
                             print(f"Auto-login attempt failed: {e}")
             
+            # Follow-up prompt is the same for every step of this task
+            follow_up = FOLLOW_UP_PROMPT.format(task=task)
+            
             # Check if we're done
             current_step = 1
             while current_step < max_steps:
@@ -846,25 +907,6 @@ class Agent:
                 current_step += 1
                 print(f"\033[93m==== Running step {current_step}/{max_steps} ====\033[0m")
                 
-                # Construct follow-up message
-                follow_up = f"""
-                Looking at the current screen, please evaluate the test status.
-                
-                Test requirements:
-                {task}
-                
-                Please write your thought process for determining if this is a PASS or a FAIL, considering:
-                1. Which requirements have been completed successfully?
-                2. Which requirements (if any) have not been completed successfully?
-                3. Are there any blocking issues that prevent completion?
-                
-                IMPORTANT: For each action you take, please always provide your reasoning. Format your actions like this:
-                [REASONING] I'm clicking this button because it appears to be the login button that will take me to the dashboard.
-                [ACTION] *click on login button*
-                
-                After your analysis, end your response with a single paragraph starting with exactly "Test PASSED." or "Test FAILED." followed by a brief explanation of the key results.
-                """
-                
                 # Get latest screenshot
                 screenshot_base64 = await computer.screenshot()
                 
@@ -878,7 +920,7 @@ class Agent:
                         },
                         {
                             "type": "input_image",
-                            "image_url": f"data:image/png;base64,{screenshot_base64}"
+                            "image_url": f"data:{computer.screenshot_mime_type};base64,{screenshot_base64}"
                         }
                     ]
                 }
@@ -929,9 +971,6 @@ class Agent:
                                     print("Detected login page - trying to find account selector")
                                     
                                     # Check for Google login selectors - these are common patterns
-                                    # Take a screenshot to debug
-                                    screenshot = await computer.screenshot()
-                                    
                                     # Try to find account selector elements by clicking in common locations
                                     # First try center of screen where first account usually is
                                     await computer.click(640, 400)
@@ -1115,8 +1154,9 @@ class Agent:
             # Make sure the directory exists
             Path(gif_path).parent.mkdir(parents=True, exist_ok=True)
             
-            # Write GIF file
-            imageio.mimsave(gif_path, self.screen_captures, fps=1)
+            # Decode the captured images and write the GIF file
+            frames = [imageio.imread(image) for image in self.screen_captures]
+            imageio.mimsave(gif_path, frames, fps=1)
             print(f"\033[94mCreated GIF with {len(self.screen_captures)} frames at {gif_path}\033[0m")
             return True
         except Exception as e:
@@ -1125,11 +1165,9 @@ class Agent:
     
     def extract_url_from_task(self, task):
         """Extract the URL to navigate to from the task description"""
-        import re
-        
         # Special case: If we find a URL: line in the task with a complete URL, use that
         if "URL:" in task:
-            url_line_match = re.search(r"URL:\s*(https?://[^\s\n]+)", task)
+            url_line_match = URL_LINE_RE.search(task)
             if url_line_match:
                 url = url_line_match.group(1)
                 # Strip any punctuation that might have been included
@@ -1138,18 +1176,8 @@ class Agent:
                 return url
         
         # Look for common URL patterns in the task
-        url_patterns = [
-            r"Navigate to (https?://[^\s]+)",
-            r"Go to (https?://[^\s]+)",
-            r"Visit (https?://[^\s]+)",
-            r"Open (https?://[^\s]+)",
-            r"Access (https?://[^\s]+)",
-            r"URL: (https?://[^\s]+)",
-            r"Navigate to the URL ([^\s]+)"
-        ]
-        
-        for pattern in url_patterns:
-            match = re.search(pattern, task)
+        for pattern in URL_PATTERNS:
+            match = pattern.search(task)
             if match:
                 url = match.group(1)
                 # Strip any punctuation that might have been included
@@ -1158,7 +1186,7 @@ class Agent:
                 return url
         
         # If no URL found, extract from the base_url that was added to the task
-        base_url_match = re.search(r"base_url:\s*([^\s\n]+)", task, re.IGNORECASE)
+        base_url_match = BASE_URL_RE.search(task)
         if base_url_match:
             base_url = base_url_match.group(1).strip()
             # Assume base_url is a path and convert to full URL
@@ -1176,11 +1204,10 @@ class Agent:
                 return base_url
         
         # Look for any HTTP URLs in the task
-        url_regex = re.compile(r'https?://[^\s\'"]+')
-        matches = url_regex.findall(task)
-        if matches:
+        match = ANY_URL_RE.search(task)
+        if match:
             # Clean up the URL
-            url = matches[0].rstrip('.,;:)')
+            url = match.group(0).rstrip('.,;:)')
             print(f"Found URL via general regex: {url}")
             return url
             
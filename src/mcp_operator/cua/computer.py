@@ -2,11 +2,141 @@
 """
 Computer implementations for the OpenAI Computer Use Agent (CUA)
 """
+import os
 import asyncio
 import base64
+import weakref
+from functools import lru_cache
 from typing import List, Dict, Tuple, Literal, Protocol, Any
 from urllib.parse import urlparse
 
+# Playwright drivers keyed by event loop. Every browser on a loop shares one
+# driver instead of each launch starting its own node process.
+_drivers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Task]" = weakref.WeakKeyDictionary()
+
+async def _start_playwright():
+    """Start a Playwright driver"""
+    from playwright.async_api import async_playwright
+    return await async_playwright().__aenter__()
+
+async def get_playwright():
+    """Return the shared Playwright driver, starting it on first use"""
+    loop = asyncio.get_running_loop()
+    driver = _drivers.get(loop)
+    if driver is None:
+        driver = _drivers[loop] = loop.create_task(_start_playwright())
+    try:
+        return await asyncio.shield(driver)
+    except Exception:
+        # Let the next caller retry instead of caching the failure
+        if _drivers.get(loop) is driver:
+            del _drivers[loop]
+        raise
+
+# Chromium processes keyed by event loop and launch settings. Browsers with the
+# same settings share one process, each working in its own context, so opening
+# another browser costs a new context instead of a new Chromium launch.
+_browsers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[bool, Tuple[str, ...]], asyncio.Task]]" = weakref.WeakKeyDictionary()
+
+async def _launch_browser(headless: bool, args: Tuple[str, ...]):
+    """Launch a Chromium process on the shared driver"""
+    playwright = await get_playwright()
+    return await playwright.chromium.launch(headless=headless, args=list(args))
+
+async def get_browser(headless: bool, args: Tuple[str, ...]):
+    """Return the shared Chromium process for these launch settings
+    
+    The process is launched on first use. Callers should open their own
+    context on it and close only that context when they are done.
+    
+    Args:
+        headless: Whether to run without a window
+        args: Chromium command-line flags
+    
+    Returns:
+        Playwright Browser
+    """
+    loop = asyncio.get_running_loop()
+    browsers = _browsers.setdefault(loop, {})
+    key = (headless, args)
+    launch = browsers.get(key)
+    if launch is None:
+        launch = browsers[key] = loop.create_task(_launch_browser(headless, args))
+    try:
+        browser = await asyncio.shield(launch)
+    except Exception:
+        # Let the next caller retry instead of caching the failure
+        if browsers.get(key) is launch:
+            del browsers[key]
+        raise
+    
+    if not browser.is_connected():
+        # The process exited or crashed; launch a new one
+        if browsers.get(key) is launch:
+            del browsers[key]
+        return await get_browser(headless, args)
+    return browser
+
+async def _close_browser(launch: asyncio.Task):
+    """Close a shared Chromium process if it launched"""
+    try:
+        browser = await launch
+    except Exception:
+        return
+    await browser.close()
+
+async def stop_playwright():
+    """Close the shared browsers and stop the Playwright driver
+    
+    Call once all browser contexts are closed.
+    """
+    launches = _browsers.pop(asyncio.get_running_loop(), None)
+    if launches:
+        await asyncio.gather(*(_close_browser(launch) for launch in launches.values()), return_exceptions=True)
+    
+    driver = _drivers.pop(asyncio.get_running_loop(), None)
+    if driver is None:
+        return
+    try:
+        playwright = await driver
+    except Exception:
+        return
+    await playwright.stop()
+
+# JPEG quality of the screenshots sent to the model. JPEG screenshots are
+# several times smaller than PNG, which shrinks every request body (0 sends PNG).
+SCREENSHOT_QUALITY = int(os.environ.get("MCP_SCREENSHOT_QUALITY", "75"))
+
+# Chromium flags for agent browsers, besides the window size
+LAUNCH_FLAGS = (
+    "--disable-extensions",
+    "--disable-web-security",  # Allow cross-domain cookies
+    "--allow-running-insecure-content",  # Allow mixed content
+    "--ignore-certificate-errors",  # Ignore SSL errors
+)
+
+# Resource types allowed from known CDNs even when their domain isn't allowed
+ESSENTIAL_RESOURCE_TYPES = frozenset({"stylesheet", "script", "font", "image", "fetch", "xhr", "other"})
+CDN_MARKERS = ("cdn", "jsdelivr", "cloudflare", "unpkg", "googleapis", "fontawesome")
+
+# Resource types blocked without logging, to reduce noise
+QUIET_RESOURCE_TYPES = frozenset({"image", "stylesheet", "font"})
+
+@lru_cache(maxsize=1024)
+def url_hostname(url: str) -> str:
+    """Return the hostname of a URL, or an empty string if it has none"""
+    return urlparse(url).hostname or ""
+
+@lru_cache(maxsize=1024)
+def is_host_allowed(hostname: str, allowed_domains: Tuple[str, ...]) -> bool:
+    """Check whether a hostname ends with one of the allowed domains"""
+    return hostname.endswith(allowed_domains)
+
+@lru_cache(maxsize=1024)
+def is_cdn_host(hostname: str) -> bool:
+    """Check whether a hostname looks like a known CDN"""
+    return any(marker in hostname for marker in CDN_MARKERS)
+
 # Computer Protocol that defines the required methods for our CUA computer
 class AsyncComputer(Protocol):
     """Defines the methods and properties required for our CUA computer"""
@@ -17,6 +147,11 @@ class AsyncComputer(Protocol):
     @property
     def dimensions(self) -> Tuple[int, int]: ...
     
+    @property
+    def screenshot_mime_type(self) -> str: ...
+    
+    async def screenshot_bytes(self) -> bytes: ...
+    
     async def screenshot(self) -> str: ...
     
     async def click(self, x: int, y: int, button: str = "left") -> None: ...
@@ -48,38 +183,37 @@ class AsyncPlaywrightComputer:
     def __init__(self, allowed_domains=None):
         self._playwright = None
         self._browser = None
+        self._context = None
         self._page = None
         self.allowed_domains = allowed_domains or ['about:blank']
         
     async def __aenter__(self):
-        from playwright.async_api import async_playwright
-        # Start Playwright
-        self._playwright = await async_playwright().start()
+        # Use the shared Playwright driver
+        self._playwright = await get_playwright()
         self._browser, self._page = await self._get_browser_and_page()
         
-        # Set up domain blocking based on allowed domains
+        # Set up domain blocking based on allowed domains. The handler runs for
+        # every request the page makes, and pages load many resources from the
+        # same few hosts, so the per-host checks are cached.
+        allowed_domains = tuple(self.allowed_domains)
+        
         async def handle_route(route, request):
             url = request.url
-            hostname = urlparse(url).hostname or ""
+            hostname = url_hostname(url)
             
             # For important resources like stylesheets, scripts, fonts, and images, be more permissive
             resource_type = request.resource_type
-            essential_resources = ["stylesheet", "script", "font", "image", "fetch", "xhr", "other"]
             
             # Check if it's allowed based on our domain list
-            is_allowed = any(hostname.endswith(domain) for domain in self.allowed_domains)
-            
-            # Additional check for essential resources from CDNs
-            cdn_domains = ["cdn", "jsdelivr", "cloudflare", "unpkg", "googleapis", "fontawesome"]
-            is_cdn = any(cdn in hostname for cdn in cdn_domains)
+            is_allowed = is_host_allowed(hostname, allowed_domains)
             
             # Allow essential resources from known CDNs even if not explicitly in our domain list
-            if resource_type in essential_resources and is_cdn:
+            if not is_allowed and resource_type in ESSENTIAL_RESOURCE_TYPES and is_cdn_host(hostname):
                 is_allowed = True
                 
             # Special case for assets in the main application domain
             try:
-                main_domain = urlparse(self._page.url).hostname
+                main_domain = url_hostname(self._page.url)
                 if main_domain and hostname and hostname.endswith(main_domain):
                     is_allowed = True
             except:
@@ -88,7 +222,7 @@ class AsyncPlaywrightComputer:
                 
             if not is_allowed:
                 # Only log and block non-essential resources to reduce noise
-                if resource_type not in ["image", "stylesheet", "font"]:
+                if resource_type not in QUIET_RESOURCE_TYPES:
                     print(f"Blocking disallowed domain: {url}")
                 await route.abort()
             else:
@@ -98,17 +232,31 @@ class AsyncPlaywrightComputer:
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self._browser:
-            await self._browser.close()
-        if self._playwright:
-            await self._playwright.stop()
+        # Close only our context; the shared browser and driver stay running
+        # for other agents
+        if self._context:
+            await self._context.close()
+        self._context = None
+        self._browser = None
+        self._page = None
+        self._playwright = None
             
+    @property
+    def screenshot_mime_type(self) -> str:
+        """MIME type of the images returned by screenshot()"""
+        return "image/jpeg" if SCREENSHOT_QUALITY else "image/png"
+        
+    async def screenshot_bytes(self) -> bytes:
+        """Capture a screenshot of the current page as encoded image bytes"""
+        # Let the browser encode it, as JPEG unless PNG is configured
+        if SCREENSHOT_QUALITY:
+            return await self._page.screenshot(full_page=False, type="jpeg", quality=SCREENSHOT_QUALITY)
+        return await self._page.screenshot(full_page=False)
+        
     async def screenshot(self) -> str:
         """Capture a screenshot of the current page"""
-        # Export as PNG
-        png_bytes = await self._page.screenshot(full_page=False)
         # Convert to base64 for API
-        return base64.b64encode(png_bytes).decode("utf-8")
+        return base64.b64encode(await self.screenshot_bytes()).decode("ascii")
         
     async def click(self, x: int, y: int, button: str = "left") -> None:
         """Click at the specified coordinates"""
@@ -140,6 +288,14 @@ class AsyncPlaywrightComputer:
         """Wait for a specified time in milliseconds"""
         await asyncio.sleep(ms / 1000)
         
+    async def wait_for_load(self, timeout_ms: int = 5000) -> None:
+        """Wait until the page fires its load event, or the timeout passes"""
+        try:
+            await self._page.wait_for_load_state("load", timeout=timeout_ms)
+        except Exception:
+            # A page still loading after the timeout is used as it is
+            pass
+        
     async def move(self, x: int, y: int) -> None:
         """Move the mouse to the specified coordinates"""
         await self._page.mouse.move(x, y)
@@ -169,8 +325,6 @@ class AsyncPlaywrightComputer:
         }
         
         for key in keys:
-            # Convert key to lowercase for case-insensitive comparison
-            key_lower = key.lower()
             # Use the mapping if available
             mapped_key = key_mapping.get(key.upper(), key)
             await self._page.keyboard.press(mapped_key)
@@ -220,23 +374,11 @@ class AsyncLocalPlaywrightComputer(AsyncPlaywrightComputer):
         """Create a local browser instance"""
         width, height = self.dimensions
         
-        # Launch arguments
-        launch_args = [
-            f"--window-size={width},{height}",
-            "--disable-extensions",
-            "--disable-web-security",  # Allow cross-domain cookies
-            "--allow-running-insecure-content",  # Allow mixed content
-            "--ignore-certificate-errors",  # Ignore SSL errors
-        ]
-        
-        # Launch the browser
-        browser = await self._playwright.chromium.launch(
-            headless=self.headless,
-            args=launch_args
-        )
+        # Use the shared browser for these settings
+        browser = await get_browser(self.headless, (f"--window-size={width},{height}", *LAUNCH_FLAGS))
         
         # Create a new browser context with more permissive settings
-        context = await browser.new_context(
+        context = self._context = await browser.new_context(
             viewport={"width": width, "height": height},
             user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
             ignore_https_errors=True,  # Ignore HTTPS errors
@@ -253,12 +395,11 @@ class AsyncLocalPlaywrightComputer(AsyncPlaywrightComputer):
             'clipboard-read',
             'clipboard-write'
         ]
-        await context.grant_permissions(permissions)
         
-        # Create a page
-        page = await context.new_page()
-        
-        # Load blank page initially
-        await page.goto("about:blank")
+        # Grant them while creating the page; new pages already start on about:blank
+        _, page = await asyncio.gather(
+            context.grant_permissions(permissions),
+            context.new_page()
+        )
         
         return browser, page
\ No newline at end of file
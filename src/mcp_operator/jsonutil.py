@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+JSON helpers that use orjson when it is installed and fall back to the stdlib
+"""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Errors raised for invalid JSON (orjson's error subclasses this)
+JSONDecodeError = json.JSONDecodeError
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parse a JSON document
+
+    Args:
+        data: JSON text as str or UTF-8 bytes
+
+    Returns:
+        Parsed Python object
+    """
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(obj: Any) -> bytes:
+    """Serialize an object to compact UTF-8 JSON
+
+    Args:
+        obj: Object to serialize
+
+    Returns:
+        JSON document as bytes
+    """
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Logging setup shared by the MCP server and browser operator
+"""
+
+import os
+import queue
+import atexit
+import logging
+import logging.handlers
+from pathlib import Path
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Roll the log file over at 10 MB, keeping three old files
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+def setup_file_logging(log_file: Path):
+    """Configure root logging to write to a file from a background thread
+
+    Log calls only put records on an in-memory queue. A QueueListener thread
+    owns the file handler, so logging from the event loop never blocks on disk
+    writes. Nothing is written to stdout, which carries the MCP protocol.
+
+    The level is DEBUG when MCP_DEBUG is set, INFO otherwise. Does nothing if
+    the root logger already has handlers.
+
+    Args:
+        log_file: Path of the log file to write
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT
+    )
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, file_handler)
+
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(logging.DEBUG if os.environ.get("MCP_DEBUG") else logging.INFO)
+
+    listener.start()
+    # Drain queued records to the file on interpreter exit
+    atexit.register(listener.stop)
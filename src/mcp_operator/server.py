@@ -5,45 +5,212 @@ MCP Server implementation for the Browser Operator
 
 import os
 import sys
-import json
 import asyncio
 import signal
+import stat
+import threading
+import time
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Union, Tuple
+from typing import Dict, Any, List, Optional, Union, Tuple, Set
+from collections import OrderedDict
 import logging
 from pathlib import Path
+from types import MappingProxyType
+
+from mcp_operator.logconfig import setup_file_logging
 
 # Set up logging to avoid interfering with MCP protocol
 log_dir = Path(os.environ.get("MCP_LOG_DIR", "logs"))
 log_dir.mkdir(exist_ok=True)
 log_file = log_dir / f"mcp_server_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
 
-# Configure logging to file only (no stdout)
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler(log_file),
-        # No stream handler to avoid interfering with MCP
-    ]
-)
+# Configure logging to file only (no stdout), written off the event loop
+setup_file_logging(log_file)
 
 logger = logging.getLogger("mcp-server")
 
 # Import our browser operator
-from mcp_operator.browser import BrowserOperator
+from mcp_operator import jsonutil
+from mcp_operator.browser import BrowserOperator, browser_pool
+from mcp_operator.cua.agent import close_session
+from mcp_operator.cua.computer import stop_playwright
+
+# Largest request line accepted from stdin
+MAX_REQUEST_SIZE = 16 * 1024 * 1024
+
+# Bytes read per call when stdin is read from a background thread
+STDIN_CHUNK_SIZE = 64 * 1024
+
+# Most browsers kept open at once; the least recently used is closed to make
+# room for a new project (0 means no limit)
+MAX_BROWSERS = int(os.environ.get("MCP_MAX_BROWSERS", "32"))
+
+# Seconds a browser may sit unused before it is closed (0 keeps browsers open
+# until they are closed or evicted), and how often to look for idle ones
+BROWSER_IDLE_TIMEOUT = float(os.environ.get("MCP_BROWSER_IDLE_TIMEOUT", "600"))
+IDLE_CHECK_INTERVAL = 30
+
+# Seconds to wait for a browser to close at shutdown before giving up on it;
+# stopping the Playwright driver afterwards still kills the process
+BROWSER_CLOSE_TIMEOUT = 10
+
+# Number of requests handled at once, and how many more may wait in line
+MAX_CONCURRENT_REQUESTS = int(os.environ.get("MCP_MAX_CONCURRENT_REQUESTS", "8"))
+REQUEST_QUEUE_SIZE = int(os.environ.get("MCP_REQUEST_QUEUE_SIZE", "64"))
+
+# Shared read-only params for requests that don't send any
+EMPTY_PARAMS = MappingProxyType({})
+
+def _can_watch_stdin() -> bool:
+    """Check whether the event loop can watch stdin for reads directly
+    
+    Returns:
+        True if stdin is a pipe, socket or terminal on POSIX
+    """
+    if sys.platform == "win32":
+        return False
+    
+    # Pipe transports only support pipes, sockets and ttys. Other character
+    # devices such as /dev/null (stdin under `docker run` without -i) can't be
+    # polled: uvloop aborts, and the stdlib loop never reports EOF.
+    try:
+        fd = sys.stdin.fileno()
+        mode = os.fstat(fd).st_mode
+    except (OSError, ValueError):
+        return False
+    return stat.S_ISFIFO(mode) or stat.S_ISSOCK(mode) or (stat.S_ISCHR(mode) and os.isatty(fd))
+
+def _feed_stdin(loop: asyncio.AbstractEventLoop, reader: asyncio.StreamReader):
+    """Copy stdin into a stream reader; runs in a background thread
+    
+    Args:
+        loop: Event loop that owns the reader
+        reader: StreamReader to feed
+    """
+    try:
+        stdin = sys.stdin.buffer
+        while True:
+            # read1 returns whatever is buffered (up to the chunk size) with
+            # at most one read call, so a burst of lines costs one wakeup
+            data = stdin.read1(STDIN_CHUNK_SIZE)
+            if not data:
+                break
+            loop.call_soon_threadsafe(reader.feed_data, data)
+    except Exception:
+        logger.exception("Error reading stdin")
+    finally:
+        try:
+            loop.call_soon_threadsafe(reader.feed_eof)
+        except RuntimeError:
+            # Event loop already closed
+            pass
+
+async def open_stdin_reader() -> asyncio.StreamReader:
+    """Connect an asyncio stream reader to stdin
+    
+    The event loop watches stdin directly when it can. Otherwise (stdin is
+    redirected from a regular file, or we are on Windows) a background
+    thread reads stdin in large chunks and feeds the reader.
+    
+    Returns:
+        StreamReader for stdin
+    """
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=MAX_REQUEST_SIZE)
+    if _can_watch_stdin():
+        protocol = asyncio.StreamReaderProtocol(reader)
+        try:
+            await loop.connect_read_pipe(lambda: protocol, sys.stdin)
+            return reader
+        except (NotImplementedError, ValueError, OSError) as e:
+            logger.info("Cannot stream stdin (%s), reading it from a thread", e)
+    else:
+        logger.info("stdin is not a pipe, reading it from a thread")
+    
+    threading.Thread(target=_feed_stdin, args=(loop, reader), name="stdin-reader", daemon=True).start()
+    return reader
+
+async def _read_request_line(reader: asyncio.StreamReader) -> Optional[bytes]:
+    """Read one request line from a stream reader
+    
+    A line longer than the reader's limit is skipped through its newline, so
+    the rest of it is never mistaken for further requests.
+    
+    Args:
+        reader: StreamReader to read from
+    
+    Returns:
+        The line, b"" at EOF, or None if the line was too long
+    """
+    try:
+        return await reader.readuntil(b"\n")
+    except asyncio.IncompleteReadError as e:
+        # EOF; keep a final line that has no newline
+        return e.partial
+    except asyncio.LimitOverrunError:
+        pass
+    
+    while True:
+        try:
+            await reader.readuntil(b"\n")
+            return None
+        except asyncio.LimitOverrunError as e:
+            # Nothing was consumed; drop what is buffered and keep looking
+            await reader.readexactly(e.consumed)
+        except asyncio.IncompleteReadError:
+            return None
 
 class MCPServer:
     """MCP Server implementation for Browser Operator"""
     
+    # JSON-RPC method names mapped to the names of their handler methods
+    METHOD_HANDLERS = {
+        "mcp__browser-operator__create-browser": "handle_create_browser",
+        "mcp__browser-operator__navigate-browser": "handle_navigate_browser",
+        "mcp__browser-operator__operate-browser": "handle_operate_browser",
+        "mcp__browser-operator__close-browser": "handle_close_browser",
+        "mcp__browser-operator__get-job-status": "handle_get_job_status",
+        "mcp__browser-operator__list-jobs": "handle_list_jobs",
+        "mcp__browser-operator__add-note": "handle_add_note",
+        
+        # Browser tools
+        "mcp__browser-tools__getConsoleLogs": "handle_get_console_logs",
+        "mcp__browser-tools__getConsoleErrors": "handle_get_console_errors",
+        "mcp__browser-tools__getNetworkErrors": "handle_get_network_errors",
+        "mcp__browser-tools__getNetworkLogs": "handle_get_network_logs",
+        "mcp__browser-tools__takeScreenshot": "handle_take_screenshot",
+        "mcp__browser-tools__getSelectedElement": "handle_get_selected_element",
+        "mcp__browser-tools__wipeLogs": "handle_wipe_logs",
+        
+        # Audit tools
+        "mcp__browser-tools__runAccessibilityAudit": "handle_run_accessibility_audit",
+        "mcp__browser-tools__runPerformanceAudit": "handle_run_performance_audit",
+        "mcp__browser-tools__runSEOAudit": "handle_run_seo_audit",
+        "mcp__browser-tools__runNextJSAudit": "handle_run_nextjs_audit",
+        "mcp__browser-tools__runBestPracticesAudit": "handle_run_best_practices_audit",
+        "mcp__browser-tools__runDebuggerMode": "handle_run_debugger_mode",
+        "mcp__browser-tools__runAuditMode": "handle_run_audit_mode"
+    }
+    
     def __init__(self):
         """Initialize the MCP server"""
-        # Dictionary of browser operators keyed by project name
-        self.operators: Dict[str, BrowserOperator] = {}
+        # Browser operators keyed by project name, least recently used first
+        self.operators: OrderedDict[str, BrowserOperator] = OrderedDict()
+        self.max_operators = MAX_BROWSERS
+        
+        # When each operator was last used, as time.monotonic() seconds
+        self._last_used: Dict[str, float] = {}
+        
+        # Close tasks for operators evicted for being idle or over max_operators
+        self._closing: Set[asyncio.Task] = set()
         
         # Request ID counter
         self.request_counter = 0
         
+        # Encoded responses waiting to be written to stdout
+        self._output_buffer = bytearray()
+        self._flush_scheduled = False
+        
         logger.info("MCP Server initialized")
     
     def _get_operator(self, project_name: str) -> BrowserOperator:
@@ -55,11 +222,94 @@ class MCPServer:
         Returns:
             BrowserOperator instance
         """
-        if project_name not in self.operators:
-            logger.info(f"Creating new operator for project: {project_name}")
-            self.operators[project_name] = BrowserOperator(project_name)
+        self._last_used[project_name] = time.monotonic()
+        operator = self.operators.get(project_name)
+        if operator is not None:
+            self.operators.move_to_end(project_name)
+            return operator
+        
+        # Evict the least recently used browsers to make room
+        while self.max_operators and len(self.operators) >= self.max_operators:
+            if not self._evict_oldest_operator():
+                logger.warning(
+                    "All %s browsers are busy, exceeding the limit for project %s",
+                    len(self.operators), project_name
+                )
+                break
+        
+        logger.info("Creating new operator for project: %s", project_name)
+        operator = self.operators[project_name] = BrowserOperator(project_name)
+        return operator
+    
+    def _remove_operator(self, project_name: str) -> Optional[BrowserOperator]:
+        """Forget a project's operator without closing it
+        
+        Args:
+            project_name: Name of the project
+        
+        Returns:
+            The removed BrowserOperator, or None if there was none
+        """
+        self._last_used.pop(project_name, None)
+        return self.operators.pop(project_name, None)
+    
+    def _close_in_background(self, operator: BrowserOperator):
+        """Close a removed operator without waiting for it
+        
+        Args:
+            operator: BrowserOperator to close
+        """
+        task = asyncio.get_running_loop().create_task(operator.close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+    
+    def _evict_oldest_operator(self) -> bool:
+        """Remove the least recently used idle operator and close it in the background
+        
+        Operators running a browser operation are skipped.
+        
+        Returns:
+            True if an operator was evicted, False if every operator is busy
+        """
+        for project_name, operator in self.operators.items():
+            if not operator.busy:
+                break
+        else:
+            return False
+        logger.info("Evicting browser for project %s (limit %s)", project_name, self.max_operators)
+        self._close_in_background(self._remove_operator(project_name))
+        return True
+    
+    def _close_idle_operators(self, idle_timeout: float):
+        """Close operators that have not been used for a while
         
-        return self.operators[project_name]
+        Operators are kept in least recently used order, so the scan stops at
+        the first one that is still fresh. Operators running a browser
+        operation are never closed and count as just used.
+        
+        Args:
+            idle_timeout: Seconds an operator may go unused
+        """
+        cutoff = time.monotonic() - idle_timeout
+        while self.operators:
+            project_name, operator = next(iter(self.operators.items()))
+            if self._last_used.get(project_name, 0) > cutoff:
+                break
+            if operator.busy:
+                self._last_used[project_name] = time.monotonic()
+                self.operators.move_to_end(project_name)
+                continue
+            logger.info("Closing browser for project %s after %ss idle", project_name, idle_timeout)
+            self._close_in_background(self._remove_operator(project_name))
+    
+    async def _reap_idle_operators(self):
+        """Periodically close operators idle for longer than BROWSER_IDLE_TIMEOUT"""
+        while True:
+            await asyncio.sleep(IDLE_CHECK_INTERVAL)
+            try:
+                self._close_idle_operators(BROWSER_IDLE_TIMEOUT)
+            except Exception:
+                logger.exception("Error closing idle browsers")
     
     def _generate_request_id(self) -> str:
         """Generate a unique request ID
@@ -117,38 +367,10 @@ class MCPServer:
         Returns:
             JSON-RPC response dict
         """
-        # Map method names to handler functions
-        method_map = {
-            "mcp__browser-operator__create-browser": self.handle_create_browser,
-            "mcp__browser-operator__navigate-browser": self.handle_navigate_browser,
-            "mcp__browser-operator__operate-browser": self.handle_operate_browser,
-            "mcp__browser-operator__close-browser": self.handle_close_browser,
-            "mcp__browser-operator__get-job-status": self.handle_get_job_status,
-            "mcp__browser-operator__list-jobs": self.handle_list_jobs,
-            "mcp__browser-operator__add-note": self.handle_add_note,
-            
-            # Browser tools
-            "mcp__browser-tools__getConsoleLogs": self.handle_get_console_logs,
-            "mcp__browser-tools__getConsoleErrors": self.handle_get_console_errors,
-            "mcp__browser-tools__getNetworkErrors": self.handle_get_network_errors,
-            "mcp__browser-tools__getNetworkLogs": self.handle_get_network_logs,
-            "mcp__browser-tools__takeScreenshot": self.handle_take_screenshot,
-            "mcp__browser-tools__getSelectedElement": self.handle_get_selected_element,
-            "mcp__browser-tools__wipeLogs": self.handle_wipe_logs,
-            
-            # Audit tools
-            "mcp__browser-tools__runAccessibilityAudit": self.handle_run_accessibility_audit,
-            "mcp__browser-tools__runPerformanceAudit": self.handle_run_performance_audit,
-            "mcp__browser-tools__runSEOAudit": self.handle_run_seo_audit,
-            "mcp__browser-tools__runNextJSAudit": self.handle_run_nextjs_audit,
-            "mcp__browser-tools__runBestPracticesAudit": self.handle_run_best_practices_audit,
-            "mcp__browser-tools__runDebuggerMode": self.handle_run_debugger_mode,
-            "mcp__browser-tools__runAuditMode": self.handle_run_audit_mode
-        }
-        
         # Check if method exists
-        if method not in method_map:
-            logger.error(f"Unknown method: {method}")
+        handler_name = self.METHOD_HANDLERS.get(method)
+        if handler_name is None:
+            logger.error("Unknown method: %s", method)
             return self._generate_error_response(
                 request_id,
                 f"Method not found: {method}",
@@ -157,11 +379,11 @@ class MCPServer:
         
         # Call the handler
         try:
-            handler = method_map[method]
+            handler = getattr(self, handler_name)
             result = await handler(params)
             return self._generate_success_response(request_id, result)
         except Exception as e:
-            logger.exception(f"Error handling method: {method}")
+            logger.exception("Error handling method: %s", method)
             return self._generate_error_response(
                 request_id,
                 f"Error executing method: {str(e)}"
@@ -195,16 +417,19 @@ class MCPServer:
         
         # Extract request data
         method = request_data["method"]
-        params = request_data.get("params", {})
-        request_id = request_data.get("id", self._generate_request_id())
+        params = request_data.get("params") or EMPTY_PARAMS
+        if "id" in request_data:
+            request_id = request_data["id"]
+        else:
+            request_id = self._generate_request_id()
         
-        logger.info(f"Request: {request_id} - {method}")
-        logger.debug(f"Params: {params}")
+        logger.debug("Request: %s - %s", request_id, method)
+        logger.debug("Params: %s", params)
         
         # Dispatch to method handler
         response = await self.dispatch_method(method, params, request_id)
         
-        logger.info(f"Response: {request_id} - {method} - {'Success' if 'result' in response else 'Error'}")
+        logger.debug("Response: %s - %s - %s", request_id, method, 'Success' if 'result' in response else 'Error')
         return response
     
     # Browser operator handlers
@@ -287,14 +512,10 @@ class MCPServer:
             logger.error("Missing project_name parameter")
             raise ValueError("Missing project_name parameter")
         
-        operator = self._get_operator(project_name)
-        result = await operator.close()
-        
-        # Remove the operator from our mapping
-        if project_name in self.operators:
-            del self.operators[project_name]
-        
-        return result
+        # Remove the operator from our mapping; closing an unknown project
+        # must not count against the browser limit
+        operator = self._remove_operator(project_name) or BrowserOperator(project_name)
+        return await operator.close()
     
     async def handle_get_job_status(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Handle get-job-status request
@@ -317,7 +538,7 @@ class MCPServer:
                 return operator.get_job_status(job_id)
         
         # Job not found
-        logger.error(f"Job not found: {job_id}")
+        logger.error("Job not found: %s", job_id)
         return {"error": f"Job not found: {job_id}"}
     
     async def handle_list_jobs(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -365,15 +586,11 @@ class MCPServer:
             logger.error("Missing content parameter")
             raise ValueError("Missing content parameter")
         
-        # Use the first available operator to add the note
+        # Use the first available operator to add the note, or a default one
+        # if none exists
         # This is a simplification - ideally we should store notes independently
-        if not self.operators:
-            # Create a default operator if none exists
-            default_project = "default-project"
-            self.operators[default_project] = BrowserOperator(default_project)
-        
-        project_name = next(iter(self.operators.keys()))
-        operator = self.operators[project_name]
+        project_name = next(iter(self.operators), "default-project")
+        operator = self._get_operator(project_name)
         return await operator.add_note(name, content)
     
     # Browser tools handlers
@@ -384,20 +601,18 @@ class MCPServer:
         Returns:
             Tuple of (project_name, operator)
         """
-        if not self.operators:
-            # Create a default operator if none exists
-            default_project = "default-project"
-            self.operators[default_project] = BrowserOperator(default_project)
-            return default_project, self.operators[default_project]
-        
-        # Return the first operator that has an initialized browser
-        for project_name, operator in self.operators.items():
-            if operator.browser_instance and operator.browser_instance.initialized:
-                return project_name, operator
-        
-        # If no initialized browsers, return the first operator
-        project_name = next(iter(self.operators.keys()))
-        return project_name, self.operators[project_name]
+        # Prefer the first operator that has an initialized browser, then the
+        # first operator, then a new default one
+        project_name = next(
+            (
+                name for name, operator in self.operators.items()
+                if operator.browser_instance and operator.browser_instance.initialized
+            ),
+            next(iter(self.operators), "default-project")
+        )
+        
+        # Count the lookup as a use so the browser isn't reaped or evicted
+        return project_name, self._get_operator(project_name)
     
     async def handle_get_console_logs(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Handle getConsoleLogs request
@@ -571,66 +786,182 @@ class MCPServer:
     
     # Main server loop
     
-    async def listen(self):
-        """Listen for incoming MCP requests from stdin"""
-        logger.info("Starting MCP server")
+    def _write_response(self, response: Dict[str, Any]):
+        """Serialize a response and queue it for writing to stdout
+        
+        Responses queued during one event loop iteration are written together
+        by a single _flush_output call.
+        
+        Args:
+            response: JSON-RPC response to send
+        """
+        data = jsonutil.dumps(response)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sending response: %s", data.decode('utf-8'))
+        
+        self._output_buffer += data
+        self._output_buffer += b"\n"
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self._flush_output)
+    
+    def _flush_output(self):
+        """Write all queued responses to stdout"""
+        self._flush_scheduled = False
+        if not self._output_buffer:
+            return
+        
+        try:
+            # Write the encoded bytes straight to the binary buffer, flushing
+            # any pending text output first so lines stay in order
+            sys.stdout.flush()
+            sys.stdout.buffer.write(self._output_buffer)
+            sys.stdout.buffer.flush()
+        except Exception:
+            logger.exception("Failed to write responses to stdout")
+        finally:
+            self._output_buffer.clear()
+    
+    async def handle_line(self, line: Union[str, bytes]):
+        """Parse a single request line, handle it and write the response
+        
+        Args:
+            line: Raw JSON-RPC request line read from stdin
+        """
+        try:
+            # Parse JSON request
+            try:
+                request_data = jsonutil.loads(line)
+                logger.debug("Received request: %s", request_data)
+            except jsonutil.JSONDecodeError as e:
+                logger.error("Invalid JSON request: %s", e)
+                response = self._generate_error_response(
+                    "",  # No ID available for invalid JSON
+                    f"Invalid JSON request: {str(e)}",
+                    -32700  # Parse error code
+                )
+            else:
+                # Process the request
+                response = await self.handle_request(request_data)
+            
+            # Send the response
+            self._write_response(response)
+            
+        except Exception as e:
+            logger.exception("Unexpected error handling request")
+            # Try to send an error response
+            error_response = self._generate_error_response(
+                "",  # No ID available for unexpected errors
+                f"Unexpected server error: {str(e)}"
+            )
+            try:
+                self._write_response(error_response)
+            except Exception:
+                # If we can't even send the error response, just log it
+                logger.critical("Failed to send error response")
+    
+    async def _request_worker(self, queue: asyncio.Queue):
+        """Handle request lines from the queue until cancelled
+        
+        Args:
+            queue: Queue of raw request lines read from stdin
+        """
         while True:
+            line = await queue.get()
             try:
-                # Read a line from stdin
-                line = await asyncio.get_event_loop().run_in_executor(None, sys.stdin.readline)
+                await self.handle_line(line)
+            finally:
+                queue.task_done()
+    
+    async def listen(self):
+        """Listen for incoming MCP requests from stdin
+        
+        Request lines are queued for a fixed pool of workers, so a slow
+        browser operation does not block reading and answering the requests
+        behind it. The bounded queue stops reading stdin when every worker is
+        busy and the backlog is full.
+        
+        Requests for different projects run in parallel. Requests that use the
+        same project's page are kept in order by that BrowserOperator's page
+        lock rather than here, so job-status and list-jobs calls for a project
+        are still answered while an operation on it is running.
+        """
+        logger.info("Starting MCP server")
+        reader = await open_stdin_reader()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=REQUEST_QUEUE_SIZE)
+        workers = [
+            asyncio.create_task(self._request_worker(queue))
+            for _ in range(MAX_CONCURRENT_REQUESTS)
+        ]
+        # Close browsers left open by clients that never close them
+        if BROWSER_IDLE_TIMEOUT > 0:
+            workers.append(asyncio.create_task(self._reap_idle_operators()))
+        try:
+            while True:
+                try:
+                    # Read a line from stdin
+                    line = await _read_request_line(reader)
+                except Exception:
+                    # The stream is broken and every further read would fail
+                    logger.exception("Error reading stdin, shutting down")
+                    break
+                
+                if line is None:
+                    # Tell the client instead of leaving it waiting
+                    logger.error("Request larger than %s bytes rejected", MAX_REQUEST_SIZE)
+                    self._write_response(self._generate_error_response(
+                        None, f"Request larger than {MAX_REQUEST_SIZE} bytes", -32600
+                    ))
+                    continue
                 
                 if not line:
                     # EOF received, exit
                     logger.info("Received EOF, shutting down")
                     break
                 
-                # Parse JSON request
-                try:
-                    request_data = json.loads(line)
-                    logger.debug(f"Received request: {request_data}")
-                except json.JSONDecodeError as e:
-                    logger.error(f"Invalid JSON request: {e}")
-                    response = self._generate_error_response(
-                        "",  # No ID available for invalid JSON
-                        f"Invalid JSON request: {str(e)}",
-                        -32700  # Parse error code
-                    )
-                else:
-                    # Process the request
-                    response = await self.handle_request(request_data)
-                
-                # Send the response
-                response_json = json.dumps(response)
-                logger.debug(f"Sending response: {response_json}")
-                print(response_json, flush=True)
-                
-            except Exception as e:
-                logger.exception("Unexpected error in server loop")
-                # Try to send an error response
-                error_response = self._generate_error_response(
-                    "",  # No ID available for unexpected errors
-                    f"Unexpected server error: {str(e)}"
-                )
-                try:
-                    print(json.dumps(error_response), flush=True)
-                except Exception:
-                    # If we can't even send the error response, just log it
-                    logger.critical("Failed to send error response")
+                await queue.put(line)
+            
+            # Let queued and in-flight requests finish and send their responses
+            await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self._flush_output()
     
     async def cleanup(self):
         """Close all browser instances and cleanup resources"""
         logger.info("Cleaning up before shutdown")
         
-        # Close all browser operators
-        for project_name, operator in self.operators.items():
-            try:
-                logger.info(f"Closing browser for project: {project_name}")
-                await operator.close()
-            except Exception as e:
-                logger.error(f"Error closing browser for project {project_name}: {e}")
-        
-        # Clear the operators dictionary
+        # Close all browser operators in parallel
+        operators = list(self.operators.items())
         self.operators.clear()
+        self._last_used.clear()
+        for project_name, _ in operators:
+            logger.info("Closing browser for project: %s", project_name)
+        results = await asyncio.gather(
+            *(asyncio.wait_for(operator.close(), BROWSER_CLOSE_TIMEOUT) for _, operator in operators),
+            return_exceptions=True
+        )
+        for (project_name, _), result in zip(operators, results):
+            if isinstance(result, asyncio.TimeoutError):
+                logger.error("Timed out closing browser for project %s", project_name)
+            elif isinstance(result, Exception):
+                logger.error("Error closing browser for project %s: %s", project_name, result)
+        
+        # Wait for browsers that were evicted earlier to finish closing
+        if self._closing:
+            _, still_closing = await asyncio.wait(self._closing, timeout=BROWSER_CLOSE_TIMEOUT)
+            if still_closing:
+                logger.error("Timed out closing %s evicted browsers", len(still_closing))
+        
+        # Close any warm browsers that were never handed out, then stop the
+        # Playwright driver they all shared
+        await browser_pool.close()
+        await stop_playwright()
+        
+        # Close the pooled connections to the model API
+        await close_session()
         logger.info("Cleanup complete")
 
 async def main():
@@ -640,29 +971,44 @@ async def main():
     
     # Set up signal handlers for graceful shutdown
     loop = asyncio.get_running_loop()
+    main_task = asyncio.current_task()
+    
+    # Start new tasks eagerly so ones that finish without awaiting skip a
+    # trip through the scheduler (Python 3.12+)
+    if hasattr(asyncio, "eager_task_factory"):
+        loop.set_task_factory(asyncio.eager_task_factory)
     
     def signal_handler():
         logger.info("Received shutdown signal")
-        # Schedule the cleanup
-        asyncio.create_task(shutdown())
-    
-    async def shutdown():
-        logger.info("Shutting down MCP server")
-        await server.cleanup()
-        loop.stop()
+        # Stop listening; cleanup runs in the finally block below
+        main_task.cancel()
     
     # Register signal handlers
     for sig in (signal.SIGINT, signal.SIGTERM):
         loop.add_signal_handler(sig, signal_handler)
     
     try:
-        # Start the server
+        # Start warming browsers, then start the server
+        browser_pool.fill()
         await server.listen()
+    except asyncio.CancelledError:
+        logger.info("Shutting down MCP server")
     except Exception as e:
-        logger.exception(f"Error in MCP server: {e}")
+        logger.exception("Error in MCP server: %s", e)
     finally:
         # Ensure cleanup on exit
         await server.cleanup()
 
+def run():
+    """Run the MCP server, using uvloop for the event loop when it is installed"""
+    try:
+        import uvloop
+        loop_factory = uvloop.new_event_loop
+    except ImportError:
+        loop_factory = None
+    
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(main())
+
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    run()
\ No newline at end of file
@@ -5,9 +5,11 @@ Tests the API methods without requiring a full server instance
 """
 
 import asyncio
+import io
 import unittest
 import os
 import sys
+import tempfile
 from pathlib import Path
 import json
 from unittest.mock import patch, MagicMock, AsyncMock
@@ -16,8 +18,12 @@ from unittest.mock import patch, MagicMock, AsyncMock
 src_dir = Path(__file__).parent.parent / "src"
 sys.path.insert(0, str(src_dir))
 
-from mcp_operator.browser import BrowserOperator, BrowserInstance
+# Keep the log files the modules open on import out of the checkout
+os.environ.setdefault("MCP_LOG_DIR", tempfile.mkdtemp(prefix="mcp-operator-test-logs-"))
+
+from mcp_operator.browser import BrowserOperator, BrowserInstance, BrowserPool, BLOCKED_URL_RE
 from mcp_operator.server import MCPServer
+from mcp_operator.cua.agent import get_session, close_session
 
 class TestBrowserOperatorMethods(unittest.TestCase):
     """Test suite for BrowserOperator methods"""
@@ -38,6 +44,17 @@ class TestBrowserOperatorMethods(unittest.TestCase):
         job_id = self.browser_operator._generate_job_id()
         self.assertTrue(job_id.startswith("job-"))
         self.assertEqual(len(job_id), 4 + 32)  # "job-" prefix + 32 hex chars
+        
+        # IDs stay unique across batch refills
+        job_ids = {self.browser_operator._generate_job_id() for _ in range(300)}
+        self.assertEqual(len(job_ids), 300)
+    
+    def test_blocked_url_pattern(self):
+        """Test that only URLs on blocked hosts match the route pattern"""
+        for url in ("https://evil.com/", "http://sub.evil.com", "https://MALWARE.ORG:8080/x"):
+            self.assertTrue(BLOCKED_URL_RE.search(url), url)
+        for url in ("https://example.com/?next=evil.com", "https://evil.com.example.com/", "about:blank"):
+            self.assertFalse(BLOCKED_URL_RE.search(url), url)
     
     def test_list_jobs(self):
         """Test listing jobs"""
@@ -111,10 +128,14 @@ class TestBrowserOperatorAsync(unittest.TestCase):
         mock_context = AsyncMock()
         mock_page = AsyncMock()
         
+        self.mock_browser = mock_browser
+        self.mock_launch = mock_playwright.chromium.launch
+        
         # Link them together
         self.mock_playwright.return_value = mock_playwright_context
         mock_playwright_context.__aenter__.return_value = mock_playwright
         mock_playwright.chromium.launch.return_value = mock_browser
+        mock_browser.is_connected = MagicMock(return_value=True)
         mock_browser.new_context.return_value = mock_context
         mock_context.new_page.return_value = mock_page
         
@@ -190,6 +211,287 @@ class TestBrowserOperatorAsync(unittest.TestCase):
             self.assertEqual(job.status, "completed")
             
         self.loop.run_until_complete(_test())
+    
+    def test_operate_browser_joins_inflight(self):
+        """Test that a repeated in-flight instruction runs only once"""
+        async def _test():
+            await self.browser_operator.create_browser()
+            release = asyncio.Event()
+            
+            async def slow_process_message(instruction):
+                await release.wait()
+                return {"success": True}
+            
+            with patch.object(BrowserOperator, "process_message", side_effect=slow_process_message) as process_message:
+                first = asyncio.create_task(self.browser_operator.operate_browser("click the button"))
+                second = asyncio.create_task(self.browser_operator.operate_browser("click the button"))
+                await asyncio.sleep(0)
+                release.set()
+                first_result, second_result = await asyncio.gather(first, second)
+            
+            self.assertEqual(first_result, second_result)
+            process_message.assert_called_once()
+            self.assertEqual(self.browser_operator.jobs[first_result["job_id"]].status, "completed")
+        
+        self.loop.run_until_complete(_test())
+    
+    def test_operate_browser_reruns_finished_instruction(self):
+        """Test that an instruction repeated right after its run finishes runs again"""
+        async def _test():
+            await self.browser_operator.create_browser()
+            release = asyncio.Event()
+            
+            async def slow_process_message(instruction):
+                await release.wait()
+                return {"success": True}
+            
+            async def repeat_on_release():
+                # Wakes in the same loop iteration the first run finishes in,
+                # before the run's done callbacks
+                await release.wait()
+                return await self.browser_operator.operate_browser("click the button")
+            
+            with patch.object(BrowserOperator, "process_message", side_effect=slow_process_message) as process_message:
+                first = asyncio.create_task(self.browser_operator.operate_browser("click the button"))
+                await asyncio.sleep(0)
+                second = asyncio.create_task(repeat_on_release())
+                await asyncio.sleep(0)
+                release.set()
+                first_result, second_result = await asyncio.gather(first, second)
+            
+            self.assertNotEqual(first_result, second_result)
+            self.assertEqual(process_message.call_count, 2)
+            self.assertEqual(self.browser_operator._inflight, {})
+        
+        self.loop.run_until_complete(_test())
+    
+    def test_operate_browser_runs_agent(self):
+        """Test that a full operate run, agent and result collection included, completes"""
+        async def _test():
+            await self.browser_operator.create_browser()
+            self.browser_operator.agent = MagicMock()
+            self.browser_operator.agent.run = AsyncMock(
+                return_value=MagicMock(success=True, message="done", screen_captures=[])
+            )
+            
+            response = await asyncio.wait_for(self.browser_operator.operate_browser("click the button"), 3)
+            
+            job = self.browser_operator.get_job_status(response["job_id"])
+            self.assertEqual(job["status"], "completed")
+            self.assertEqual(job["result"]["text"], "done")
+            self.assertFalse(self.browser_operator.busy)
+        
+        self.loop.run_until_complete(_test())
+    
+    def test_operate_browser_serializes_instructions(self):
+        """Test that different instructions on one browser take turns"""
+        async def _test():
+            await self.browser_operator.create_browser()
+            running = []
+            overlapped = False
+            
+            async def slow_process_message(instruction):
+                nonlocal overlapped
+                overlapped = overlapped or bool(running)
+                running.append(instruction)
+                await asyncio.sleep(0.01)
+                running.remove(instruction)
+                return {"success": True}
+            
+            with patch.object(BrowserOperator, "process_message", side_effect=slow_process_message) as process_message:
+                await asyncio.gather(
+                    self.browser_operator.operate_browser("click the button"),
+                    self.browser_operator.operate_browser("scroll down")
+                )
+            
+            self.assertEqual(process_message.call_count, 2)
+            self.assertFalse(overlapped)
+        
+        self.loop.run_until_complete(_test())
+    
+    def test_concurrent_create_browser(self):
+        """Test that concurrent creates leave one live browser and close the rest"""
+        async def _test():
+            contexts = []
+            
+            def new_context(**kwargs):
+                contexts.append(AsyncMock())
+                return contexts[-1]
+            
+            self.mock_browser.new_context.side_effect = new_context
+            await asyncio.gather(
+                self.browser_operator.create_browser(),
+                self.browser_operator.create_browser()
+            )
+            
+            self.assertEqual(len(contexts), 2)
+            open_contexts = [context for context in contexts if not context.close.await_count]
+            self.assertEqual(open_contexts, [self.browser_operator.browser_instance.context])
+        
+        self.loop.run_until_complete(_test())
+    
+    def test_close_waits_for_operate(self):
+        """Test that close doesn't tear down the browser under a running instruction"""
+        async def _test():
+            await self.browser_operator.create_browser()
+            instances = []
+            started = asyncio.Event()
+            
+            async def slow_process_message(instruction):
+                started.set()
+                await asyncio.sleep(0.01)
+                instances.append(self.browser_operator.browser_instance)
+                return {"success": True}
+            
+            with patch.object(BrowserOperator, "process_message", side_effect=slow_process_message):
+                operate = asyncio.create_task(self.browser_operator.operate_browser("click the button"))
+                await started.wait()
+                await self.browser_operator.close()
+                await operate
+            
+            self.assertIsNotNone(instances[0])
+            self.assertIsNone(self.browser_operator.browser_instance)
+        
+        self.loop.run_until_complete(_test())
+    
+    def test_tools_wait_for_operate(self):
+        """Test that page tools run after the instruction already driving the page"""
+        async def _test():
+            await self.browser_operator.create_browser()
+            events = []
+            started = asyncio.Event()
+            
+            async def slow_process_message(instruction):
+                started.set()
+                await asyncio.sleep(0.01)
+                events.append("operate")
+                return {"success": True}
+            
+            with patch.object(BrowserOperator, "process_message", side_effect=slow_process_message):
+                operate = asyncio.create_task(self.browser_operator.operate_browser("click the button"))
+                await started.wait()
+                await self.browser_operator.take_screenshot()
+                events.append("screenshot")
+                await operate
+            
+            self.assertEqual(events, ["operate", "screenshot"])
+        
+        self.loop.run_until_complete(_test())
+    
+    def test_shared_playwright_driver(self):
+        """Test that browsers share one Playwright driver"""
+        async def _test():
+            other_operator = BrowserOperator("other-project")
+            await self.browser_operator.create_browser()
+            await other_operator.create_browser()
+            
+            self.mock_playwright.assert_called_once()
+            self.assertIs(
+                self.browser_operator.browser_instance.playwright,
+                other_operator.browser_instance.playwright
+            )
+            
+        self.loop.run_until_complete(_test())
+
+    def test_shared_browser(self):
+        """Test that projects share one browser process with separate contexts"""
+        async def _test():
+            other_operator = BrowserOperator("other-project")
+            await self.browser_operator.create_browser()
+            await other_operator.create_browser()
+            
+            self.mock_launch.assert_awaited_once()
+            self.assertEqual(self.mock_browser.new_context.await_count, 2)
+            self.assertIs(
+                self.browser_operator.browser_instance.browser,
+                other_operator.browser_instance.browser
+            )
+            
+            # Closing one project leaves the shared browser running
+            await self.browser_operator.close()
+            self.mock_browser.close.assert_not_awaited()
+        
+        self.loop.run_until_complete(_test())
+
+class TestHTTPSession(unittest.TestCase):
+    """Test the shared HTTP session used for API calls"""
+    
+    def test_session_per_event_loop(self):
+        """Test that each event loop gets its own session"""
+        async def _get_session():
+            return get_session()
+        
+        first_loop = asyncio.new_event_loop()
+        second_loop = asyncio.new_event_loop()
+        try:
+            first = first_loop.run_until_complete(_get_session())
+            second = second_loop.run_until_complete(_get_session())
+            self.assertIsNot(first, second)
+            self.assertIs(second_loop.run_until_complete(_get_session()), second)
+            
+            second_loop.run_until_complete(close_session())
+            self.assertTrue(second.closed)
+            self.assertFalse(first.closed)
+            first_loop.run_until_complete(close_session())
+            self.assertTrue(first.closed)
+        finally:
+            first_loop.close()
+            second_loop.close()
+
+class TestBrowserPool(unittest.TestCase):
+    """Test the warm browser pool"""
+    
+    def setUp(self):
+        """Set up test environment"""
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        
+        # Avoid launching real browsers
+        self.patchers = [
+            patch.object(BrowserInstance, "initialize", AsyncMock()),
+            patch.object(BrowserInstance, "close", AsyncMock()),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        for patcher in self.patchers:
+            patcher.stop()
+        self.loop.close()
+    
+    def test_acquire_uses_warm_browser(self):
+        """Test that acquire hands out a warm browser and refills the pool"""
+        async def _test():
+            pool = BrowserPool(1)
+            pool.fill()
+            await asyncio.gather(*pool._warming)
+            self.assertEqual(len(pool._idle), 1)
+            warm = pool._idle[0]
+            
+            instance = await pool.acquire("test-project")
+            self.assertIs(instance, warm)
+            self.assertEqual(instance.project_name, "test-project")
+            
+            # The pool starts warming a replacement
+            await asyncio.gather(*pool._warming)
+            self.assertEqual(len(pool._idle), 1)
+            
+            await pool.close()
+            self.assertEqual(pool._idle, [])
+            
+        self.loop.run_until_complete(_test())
+    
+    def test_disabled_pool(self):
+        """Test that a zero-sized pool launches browsers on demand"""
+        async def _test():
+            pool = BrowserPool(0)
+            instance = await pool.acquire("test-project")
+            self.assertEqual(instance.project_name, "test-project")
+            self.assertEqual(pool._idle, [])
+            self.assertEqual(pool._warming, set())
+            
+        self.loop.run_until_complete(_test())
 
 class TestMCPServer(unittest.TestCase):
     """Test MCP Server method dispatch"""
@@ -203,7 +505,7 @@ class TestMCPServer(unittest.TestCase):
         self.mock_browser_operator_class = self.browser_operator_patcher.start()
         
         # Set up the mock browser operator
-        self.mock_browser_operator = MagicMock()
+        self.mock_browser_operator = MagicMock(busy=False)
         self.mock_browser_operator_class.return_value = self.mock_browser_operator
         
         # Setup async mock methods
@@ -236,6 +538,122 @@ class TestMCPServer(unittest.TestCase):
         # Only one operator should have been created
         self.mock_browser_operator_class.assert_called_once_with("test-project")
     
+    def test_operator_limit(self):
+        """Test that the least recently used operator is evicted at the limit"""
+        async def _test():
+            self.server.max_operators = 2
+            self.server._get_operator("project-1")
+            self.server._get_operator("project-2")
+            self.server._get_operator("project-1")  # project-2 is now the oldest
+            self.server._get_operator("project-3")
+            
+            self.assertEqual(list(self.server.operators), ["project-1", "project-3"])
+            await asyncio.gather(*self.server._closing)
+            self.mock_browser_operator.close.assert_awaited_once()
+        
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(_test())
+        finally:
+            loop.close()
+    
+    def test_operator_limit_skips_busy(self):
+        """Test that eviction skips busy operators and exceeds the limit when all are busy"""
+        async def _test():
+            busy = MagicMock(busy=True, close=AsyncMock())
+            idle = MagicMock(busy=False, close=AsyncMock())
+            self.mock_browser_operator_class.side_effect = [busy, idle, busy, busy]
+            self.server.max_operators = 2
+            self.server._get_operator("busy-project")
+            self.server._get_operator("idle-project")
+            self.server._get_operator("project-3")
+            
+            self.assertEqual(list(self.server.operators), ["busy-project", "project-3"])
+            
+            self.server._get_operator("project-4")
+            self.assertEqual(list(self.server.operators), ["busy-project", "project-3", "project-4"])
+            await asyncio.gather(*self.server._closing)
+            idle.close.assert_awaited_once()
+            busy.close.assert_not_awaited()
+        
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(_test())
+        finally:
+            loop.close()
+    
+    def test_get_active_operator_marks_used(self):
+        """Test that browser tool lookups count as a use of the operator"""
+        async def _test():
+            active = MagicMock(busy=False)
+            active.browser_instance.initialized = True
+            inactive = MagicMock(busy=False, browser_instance=None)
+            self.mock_browser_operator_class.side_effect = [active, inactive]
+            self.server._get_operator("active-project")
+            self.server._get_operator("inactive-project")
+            self.server._last_used["active-project"] -= 60
+            
+            project_name, operator = await self.server._get_active_operator()
+            
+            self.assertEqual(project_name, "active-project")
+            self.assertIs(operator, active)
+            self.assertEqual(list(self.server.operators), ["inactive-project", "active-project"])
+            self.server._close_idle_operators(30)
+            self.assertIn("active-project", self.server.operators)
+        
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(_test())
+        finally:
+            loop.close()
+    
+    def test_close_idle_operators(self):
+        """Test that idle operators are closed and busy ones are kept"""
+        async def _test():
+            idle = MagicMock(busy=False, close=AsyncMock())
+            busy = MagicMock(busy=True, close=AsyncMock())
+            self.mock_browser_operator_class.side_effect = [idle, busy, MagicMock()]
+            self.server._get_operator("idle-project")
+            self.server._get_operator("busy-project")
+            self.server._get_operator("fresh-project")
+            self.server._last_used["idle-project"] -= 60
+            self.server._last_used["busy-project"] -= 60
+            
+            self.server._close_idle_operators(30)
+            
+            self.assertEqual(list(self.server.operators), ["fresh-project", "busy-project"])
+            self.assertNotIn("idle-project", self.server._last_used)
+            await asyncio.gather(*self.server._closing)
+            idle.close.assert_awaited_once()
+            busy.close.assert_not_awaited()
+        
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(_test())
+        finally:
+            loop.close()
+    
+    def test_cleanup_timeout(self):
+        """Test that a browser that hangs while closing doesn't block cleanup"""
+        async def _test():
+            self.mock_browser_operator.close = AsyncMock(side_effect=asyncio.Event().wait)
+            self.server._get_operator("test-project")
+            
+            with patch("mcp_operator.server.BROWSER_CLOSE_TIMEOUT", 0.01):
+                await self.server.cleanup()
+            self.assertEqual(len(self.server.operators), 0)
+        
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(_test())
+        finally:
+            loop.close()
+    
     def test_dispatch_method(self):
         """Test dispatching methods"""
         async def _test():
@@ -275,6 +693,163 @@ class TestMCPServer(unittest.TestCase):
         finally:
             loop.close()
 
+    def test_handle_request(self):
+        """Test request ids and default params"""
+        async def _test():
+            # Client-supplied ids are echoed and don't consume generated ids
+            response = await self.server.handle_request({
+                "jsonrpc": "2.0",
+                "id": 3,
+                "method": "mcp__browser-operator__list-jobs"
+            })
+            self.assertEqual(response["id"], 3)
+            self.assertEqual(self.server.request_counter, 0)
+            
+            # Requests without an id get a generated one
+            response = await self.server.handle_request({
+                "jsonrpc": "2.0",
+                "method": "mcp__browser-operator__list-jobs",
+                "params": None
+            })
+            self.assertEqual(response["id"], "mcp-req-1")
+            self.assertIn("result", response)
+        
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(_test())
+        finally:
+            loop.close()
+    
+    @staticmethod
+    def _binary_stdout():
+        """Build a stdout replacement backed by an in-memory byte buffer"""
+        return io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+    
+    def test_handle_line(self):
+        """Test handling raw request lines"""
+        async def _test():
+            # Valid request is dispatched and answered on stdout
+            with patch("sys.stdout", new_callable=self._binary_stdout) as stdout:
+                await self.server.handle_line(json.dumps({
+                    "jsonrpc": "2.0",
+                    "id": 7,
+                    "method": "mcp__browser-operator__create-browser",
+                    "params": {"project_name": "test-project"}
+                }).encode("utf-8") + b"\n")
+                await asyncio.sleep(0)  # Let the scheduled flush run
+            response = json.loads(stdout.buffer.getvalue())
+            self.assertEqual(response["id"], 7)
+            self.assertEqual(response["result"], {"job_id": "test-job"})
+            
+            # Invalid JSON produces a parse error
+            with patch("sys.stdout", new_callable=self._binary_stdout) as stdout:
+                await self.server.handle_line("not json\n")
+                await asyncio.sleep(0)
+            response = json.loads(stdout.buffer.getvalue())
+            self.assertEqual(response["error"]["code"], -32700)
+            
+            # Responses finished in the same loop iteration share one write
+            with patch("sys.stdout", new_callable=self._binary_stdout) as stdout:
+                with patch.object(stdout.buffer, "write", wraps=stdout.buffer.write) as write:
+                    await asyncio.gather(
+                        self.server.handle_line("not json\n"),
+                        self.server.handle_line("still not json\n")
+                    )
+                    await asyncio.sleep(0)
+            self.assertEqual(write.call_count, 1)
+            self.assertEqual(len(stdout.buffer.getvalue().splitlines()), 2)
+        
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(_test())
+        finally:
+            loop.close()
+    
+    def test_listen(self):
+        """Test that listen answers every queued request before returning"""
+        async def _test():
+            reader = asyncio.StreamReader()
+            for request_id in range(20):
+                reader.feed_data(json.dumps({
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "method": "mcp__browser-operator__list-jobs"
+                }).encode("utf-8") + b"\n")
+            reader.feed_eof()
+            
+            with patch("mcp_operator.server.open_stdin_reader", AsyncMock(return_value=reader)), \
+                    patch("sys.stdout", new_callable=self._binary_stdout) as stdout:
+                await self.server.listen()
+            responses = [json.loads(line) for line in stdout.buffer.getvalue().splitlines()]
+            self.assertEqual(sorted(response["id"] for response in responses), list(range(20)))
+        
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(_test())
+        finally:
+            loop.close()
+    
+    def test_listen_oversized_request(self):
+        """Test that listen rejects an oversized line and keeps serving"""
+        async def _test():
+            reader = asyncio.StreamReader(limit=128)
+            reader.feed_data(b"x" * 256 + b"\n")
+            reader.feed_data(json.dumps({
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "mcp__browser-operator__list-jobs"
+            }).encode("utf-8") + b"\n")
+            reader.feed_eof()
+            
+            with patch("mcp_operator.server.open_stdin_reader", AsyncMock(return_value=reader)), \
+                    patch("sys.stdout", new_callable=self._binary_stdout) as stdout:
+                await self.server.listen()
+            responses = [json.loads(line) for line in stdout.buffer.getvalue().splitlines()]
+            self.assertEqual(responses[0]["error"]["code"], -32600)
+            self.assertEqual(responses[1]["id"], 1)
+        
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(_test())
+        finally:
+            loop.close()
+
+    def test_listen_oversized_request_in_chunks(self):
+        """Test that an oversized line arriving in pieces gets exactly one error"""
+        async def _test():
+            reader = asyncio.StreamReader(limit=128)
+            request = json.dumps({
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "mcp__browser-operator__list-jobs"
+            }).encode("utf-8") + b"\n"
+            
+            async def feed():
+                data = b"x" * 400 + b"\n" + request
+                for start in range(0, len(data), 50):
+                    reader.feed_data(data[start:start + 50])
+                    await asyncio.sleep(0)
+                reader.feed_eof()
+            
+            with patch("mcp_operator.server.open_stdin_reader", AsyncMock(return_value=reader)), \
+                    patch("sys.stdout", new_callable=self._binary_stdout) as stdout:
+                await asyncio.gather(self.server.listen(), feed())
+            responses = [json.loads(line) for line in stdout.buffer.getvalue().splitlines()]
+            self.assertEqual(len(responses), 2)
+            self.assertEqual(responses[0]["error"]["code"], -32600)
+            self.assertEqual(responses[1]["id"], 1)
+        
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(_test())
+        finally:
+            loop.close()
+
 class TestBrowserToolsMethods(unittest.TestCase):
     """Test browser tools and audit methods"""
     